@@ -73,6 +73,26 @@ DATABASES = {
     }
 }
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Query and chunk embeddings are cached on disk so repeated evaluation runs
+# and searches skip the embedding model. EmbeddingFileCache only counts its
+# files every thousand writes instead of on every write.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'embeddings': {
+        'BACKEND': 'search.cache_backends.EmbeddingFileCache',
+        'LOCATION': os.getenv('EMBEDDING_CACHE_DIR', str(BASE_DIR / 'data' / 'cache' / 'embeddings')),
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -7,7 +7,7 @@ from django.http import HttpResponseRedirect
 from django.utils import timezone
 
 from .models import Document, Chunk, EvaluationQuery, EvaluationRun, EvaluationResult
-from .evaluation_utils import run_evaluation
+from .evaluation_utils import rank_distribution_for_run, run_evaluation
 
 
 @admin.register(Document)
@@ -22,6 +22,7 @@ class DocumentAdmin(admin.ModelAdmin):
 @admin.register(Chunk)
 class ChunkAdmin(admin.ModelAdmin):
     list_display = ['document', 'section_name', 'anchor', 'token_count']
+    list_select_related = ['document']
     list_filter = ['section_name', 'document__section', 'document__version_tag']
     search_fields = ['text', 'anchor', 'document__name']
     readonly_fields = ['id']
@@ -64,7 +65,7 @@ class EvaluationQueryAdmin(admin.ModelAdmin):
             )
             
             # Run evaluation for selected queries only
-            from .evaluation_utils import evaluate_single_query
+            from .evaluation_utils import compute_metrics_for_rank, evaluate_single_query
             
             searcher = None
             successful_queries = 0
@@ -83,6 +84,9 @@ class EvaluationQueryAdmin(admin.ModelAdmin):
             for query in queryset:
                 try:
                     eval_result = evaluate_single_query(query, 'vector', 0.7, 20, searcher)
+                    metrics = (
+                        compute_metrics_for_rank(eval_result['target_chunk_rank']) if eval_result['success'] else {}
+                    )
                     
                     # Create evaluation result
                     result = EvaluationResult.objects.create(
@@ -92,30 +96,22 @@ class EvaluationQueryAdmin(admin.ModelAdmin):
                         target_chunk_found=eval_result['target_chunk_found'],
                         target_chunk_rank=eval_result['target_chunk_rank'],
                         target_chunk_score=eval_result['target_chunk_score'],
-                        recall_at_1=eval_result['metrics'].get('recall_at_1'),
-                        recall_at_5=eval_result['metrics'].get('recall_at_5'),
-                        recall_at_10=eval_result['metrics'].get('recall_at_10'),
-                        recall_at_20=eval_result['metrics'].get('recall_at_20'),
-                        ndcg_at_1=eval_result['metrics'].get('ndcg_at_1'),
-                        ndcg_at_5=eval_result['metrics'].get('ndcg_at_5'),
-                        ndcg_at_10=eval_result['metrics'].get('ndcg_at_10'),
-                        ndcg_at_20=eval_result['metrics'].get('ndcg_at_20'),
-                        mrr=eval_result['metrics'].get('mrr'),
+                        **metrics,
                         error_message=eval_result['error_message'],
                         success=eval_result['success']
                     )
                     
                     if eval_result['success']:
                         successful_queries += 1
-                        all_recall_at_1.append(eval_result['metrics'].get('recall_at_1', 0))
-                        all_recall_at_5.append(eval_result['metrics'].get('recall_at_5', 0))
-                        all_recall_at_10.append(eval_result['metrics'].get('recall_at_10', 0))
-                        all_recall_at_20.append(eval_result['metrics'].get('recall_at_20', 0))
-                        all_ndcg_at_1.append(eval_result['metrics'].get('ndcg_at_1', 0))
-                        all_ndcg_at_5.append(eval_result['metrics'].get('ndcg_at_5', 0))
-                        all_ndcg_at_10.append(eval_result['metrics'].get('ndcg_at_10', 0))
-                        all_ndcg_at_20.append(eval_result['metrics'].get('ndcg_at_20', 0))
-                        all_mrr.append(eval_result['metrics'].get('mrr', 0))
+                        all_recall_at_1.append(metrics['recall_at_1'])
+                        all_recall_at_5.append(metrics['recall_at_5'])
+                        all_recall_at_10.append(metrics['recall_at_10'])
+                        all_recall_at_20.append(metrics['recall_at_20'])
+                        all_ndcg_at_1.append(metrics['ndcg_at_1'])
+                        all_ndcg_at_5.append(metrics['ndcg_at_5'])
+                        all_ndcg_at_10.append(metrics['ndcg_at_10'])
+                        all_ndcg_at_20.append(metrics['ndcg_at_20'])
+                        all_mrr.append(metrics['mrr'])
                     else:
                         failed_queries += 1
                         
@@ -144,6 +140,7 @@ class EvaluationQueryAdmin(admin.ModelAdmin):
                 evaluation_run.ndcg_at_20 = sum(all_ndcg_at_20) / len(all_ndcg_at_20)
                 evaluation_run.mrr = sum(all_mrr) / len(all_mrr)
             
+            evaluation_run.rank_distribution = rank_distribution_for_run(evaluation_run)
             evaluation_run.status = 'completed'
             evaluation_run.completed_at = timezone.now()
             evaluation_run.save()
@@ -201,7 +198,7 @@ class EvaluationRunAdmin(admin.ModelAdmin):
                    'recall_at_5', 'ndcg_at_5', 'mrr', 'created_at']
     list_filter = ['status', 'search_type', 'created_at']
     search_fields = ['name', 'embedding_model']
-    readonly_fields = ['id', 'created_at', 'completed_at']
+    readonly_fields = ['id', 'created_at', 'updated_at', 'completed_at']
     ordering = ['-created_at']
     actions = ['rerun_evaluation']
     
@@ -210,7 +207,7 @@ class EvaluationRunAdmin(admin.ModelAdmin):
             'fields': ('name', 'status', 'search_type', 'score_threshold', 'limit', 'embedding_model')
         }),
         ('Timestamps', {
-            'fields': ('created_at', 'completed_at')
+            'fields': ('created_at', 'updated_at', 'completed_at')
         }),
         ('Summary Statistics', {
             'fields': ('total_queries', 'successful_queries', 'failed_queries')
@@ -264,6 +261,7 @@ class EvaluationRunAdmin(admin.ModelAdmin):
 class EvaluationResultAdmin(admin.ModelAdmin):
     list_display = ['query_short', 'evaluation_run', 'target_chunk_found', 'target_chunk_rank', 
                    'recall_at_5', 'ndcg_at_5', 'mrr', 'success']
+    list_select_related = ['evaluation_run', 'query']
     list_filter = ['target_chunk_found', 'success', 'evaluation_run__status', 'evaluation_run']
     search_fields = ['query__query', 'query__document_id']
     readonly_fields = ['id', 'created_at']
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class SearchConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'search'
\ No newline at end of file
+    name = 'search'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
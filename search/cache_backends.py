@@ -0,0 +1,29 @@
+"""
+Cache backends used by the search app.
+"""
+import itertools
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+# Writes between two checks of the entry count in EmbeddingFileCache
+CULL_CHECK_INTERVAL = 1000
+
+# Writes made by this process, shared by the per-thread cache instances
+_writes = itertools.count(1)
+
+
+class EmbeddingFileCache(FileBasedCache):
+    """
+    FileBasedCache that counts its entries only every CULL_CHECK_INTERVAL writes.
+    
+    FileBasedCache lists the whole cache directory on every set to decide
+    whether to cull, so writes get slower as the cache grows. Between checks
+    the directory may exceed MAX_ENTRIES by up to CULL_CHECK_INTERVAL
+    entries per process.
+    """
+    
+    def _cull(self):
+        if next(_writes) % CULL_CHECK_INTERVAL:
+            return
+        super()._cull()
@@ -3,86 +3,116 @@ Evaluation utilities for computing search metrics.
 """
 import math
 from typing import List, Dict, Any, Optional
+
+import numpy as np
+import orjson
 from django.db import transaction
+from django.db.models import Count, F
 from django.utils import timezone
 
 from .models import EvaluationRun, EvaluationResult, EvaluationQuery, Chunk
-from .search import ManPageSearch
+from .search import get_searcher
+
+
+# Cutoffs for Recall@k and nDCG@k
+METRIC_KS = (1, 5, 10, 20)
+
+# Per-query metric fields, in the column order used for aggregation
+METRIC_FIELDS = (
+    'recall_at_1', 'recall_at_5', 'recall_at_10', 'recall_at_20',
+    'ndcg_at_1', 'ndcg_at_5', 'ndcg_at_10', 'ndcg_at_20',
+    'mrr',
+)
+
+# Queries searched per search_chunks_batch call in run_evaluation; a failed
+# batch only fails its own queries
+EVALUATION_SEARCH_BATCH_SIZE = 64
+
+# Width of the target rank buckets in a run's rank distribution
+RANK_BUCKET_SIZE = 5
 
 
-def compute_recall_at_k(retrieved_chunk_ids: List[str], target_chunk_id: str, k: int) -> float:
+def _rank_bucket_label(bucket: int) -> str:
+    """Label of 0-indexed rank bucket, e.g. '6-10' for bucket 1."""
+    return f"{bucket * RANK_BUCKET_SIZE + 1}-{(bucket + 1) * RANK_BUCKET_SIZE}"
+
+
+def rank_distribution_from_ranks(ranks) -> List[List[Any]]:
     """
-    Compute Recall@k metric.
+    Count target ranks per bucket of RANK_BUCKET_SIZE ranks.
     
     Args:
-        retrieved_chunk_ids: List of retrieved chunk IDs in order
-        target_chunk_id: ID of the target chunk that should be found
-        k: Number of top results to consider
+        ranks: 1-based target ranks; falsy entries (not found) are skipped
     
     Returns:
-        Recall@k value (0.0 to 1.0)
+        [label, count] pairs in rank order
     """
-    if not retrieved_chunk_ids or not target_chunk_id:
-        return 0.0
-    
-    # Check if target chunk is in top-k results
-    top_k_ids = retrieved_chunk_ids[:k]
-    return 1.0 if target_chunk_id in top_k_ids else 0.0
+    counts = {}
+    for rank in ranks:
+        if rank:
+            bucket = (rank - 1) // RANK_BUCKET_SIZE
+            counts[bucket] = counts.get(bucket, 0) + 1
+    return [[_rank_bucket_label(bucket), counts[bucket]] for bucket in sorted(counts)]
 
 
-def compute_ndcg_at_k(retrieved_chunk_ids: List[str], target_chunk_id: str, k: int) -> float:
+def rank_distribution_for_run(evaluation_run: EvaluationRun) -> List[List[Any]]:
+    """Count the stored target ranks of a run per bucket in SQL, as [label, count] pairs in rank order."""
+    buckets = evaluation_run.results.filter(
+        target_chunk_found=True, target_chunk_rank__gte=1
+    ).annotate(
+        bucket=(F('target_chunk_rank') - 1) / RANK_BUCKET_SIZE
+    ).values('bucket').annotate(count=Count('id')).order_by('bucket')
+    return [[_rank_bucket_label(row['bucket']), row['count']] for row in buckets]
+
+
+def compute_metrics_from_ranks(ranks: np.ndarray) -> np.ndarray:
     """
-    Compute nDCG@k metric.
+    Compute all per-query metrics at once from target ranks.
+    
+    With a single relevant chunk per query, Recall@k, nDCG@k and MRR depend
+    only on the rank of that chunk, so the whole batch is evaluated with a
+    few array operations over an (N, depth) hit matrix.
     
     Args:
-        retrieved_chunk_ids: List of retrieved chunk IDs in order
-        target_chunk_id: ID of the target chunk that should be found
-        k: Number of top results to consider
+        ranks: 1-indexed rank of the target chunk per query, 0 if not retrieved
     
     Returns:
-        nDCG@k value (0.0 to 1.0)
+        (N, len(METRIC_FIELDS)) array with columns in METRIC_FIELDS order
     """
-    if not retrieved_chunk_ids or not target_chunk_id:
-        return 0.0
+    ranks = np.asarray(ranks, dtype=np.int64)
+    depth = max(METRIC_KS[-1], int(ranks.max(initial=0)))
+    hits = ranks[:, np.newaxis] == np.arange(1, depth + 1)
+    discounts = 1.0 / np.log2(np.arange(2, depth + 2))
     
-    # Binary relevance: 1 if target chunk is found, 0 otherwise
-    def relevance(chunk_id: str) -> float:
-        return 1.0 if chunk_id == target_chunk_id else 0.0
+    recall = [hits[:, :k].any(axis=1) for k in METRIC_KS]
+    # Ideal DCG for a single relevant item is discounts[0] == 1.0
+    ndcg = [(hits[:, :k] * discounts[:k]).sum(axis=1) / discounts[0] for k in METRIC_KS]
+    mrr = np.where(ranks > 0, 1.0 / np.maximum(ranks, 1), 0.0)
     
-    # Compute DCG@k
-    dcg = 0.0
-    for i, chunk_id in enumerate(retrieved_chunk_ids[:k]):
-        dcg += relevance(chunk_id) / math.log2(i + 2)  # i+2 because log2(1) = 0
-    
-    # Compute IDCG@k (ideal DCG)
-    # For binary relevance, IDCG@k = 1.0 if k >= 1, 0.0 otherwise
-    idcg = 1.0 if k >= 1 else 0.0
-    
-    # Compute nDCG@k
-    return dcg / idcg if idcg > 0 else 0.0
+    return np.column_stack(recall + ndcg + [mrr]).astype(np.float64)
 
 
-def compute_mrr(retrieved_chunk_ids: List[str], target_chunk_id: str) -> float:
+def compute_metrics_for_rank(rank: Optional[int]) -> Dict[str, float]:
     """
-    Compute Mean Reciprocal Rank (MRR) metric.
+    Compute the metrics of a single query in closed form from its target rank.
+    
+    Equivalent to one row of compute_metrics_from_ranks, without building a
+    hit matrix; for evaluating queries one at a time.
     
     Args:
-        retrieved_chunk_ids: List of retrieved chunk IDs in order
-        target_chunk_id: ID of the target chunk that should be found
+        rank: 1-indexed rank of the target chunk, 0 or None if not retrieved
     
     Returns:
-        MRR value (0.0 to 1.0)
+        Dictionary with one value per METRIC_FIELDS entry
     """
-    if not retrieved_chunk_ids or not target_chunk_id:
-        return 0.0
-    
-    # Find the rank of the target chunk (1-indexed)
-    try:
-        rank = retrieved_chunk_ids.index(target_chunk_id) + 1
-        return 1.0 / rank
-    except ValueError:
-        # Target chunk not found
-        return 0.0
+    rank = rank or 0
+    metrics = {}
+    for k in METRIC_KS:
+        found = 0 < rank <= k
+        metrics[f'recall_at_{k}'] = 1.0 if found else 0.0
+        metrics[f'ndcg_at_{k}'] = 1.0 / math.log2(rank + 1) if found else 0.0
+    metrics['mrr'] = 1.0 / rank if rank else 0.0
+    return metrics
 
 
 def find_target_chunk(query: EvaluationQuery) -> Optional[Chunk]:
@@ -119,8 +149,21 @@ def find_target_chunk(query: EvaluationQuery) -> Optional[Chunk]:
     return None
 
 
+def failed_query_result(error_message: Optional[str] = None) -> Dict[str, Any]:
+    """Return an unsuccessful evaluate_single_query result with error_message."""
+    return {
+        'success': False,
+        'target_chunk_found': False,
+        'target_chunk_rank': None,
+        'target_chunk_score': None,
+        'retrieved_chunks': [],
+        'error_message': error_message
+    }
+
+
 def evaluate_single_query(query: EvaluationQuery, search_type: str = 'vector', 
-                         score_threshold: float = 0.7, limit: int = 20, searcher=None) -> Dict[str, Any]:
+                         score_threshold: float = 0.7, limit: int = 20, searcher=None,
+                         chunks=None) -> Dict[str, Any]:
     """
     Evaluate a single query against the search system.
     
@@ -129,19 +172,12 @@ def evaluate_single_query(query: EvaluationQuery, search_type: str = 'vector',
         search_type: Type of search to perform
         score_threshold: Score threshold for search
         limit: Maximum number of results to retrieve
+        chunks: Already retrieved chunks for this query; searched if omitted
     
     Returns:
         Dictionary containing evaluation results
     """
-    result = {
-        'success': False,
-        'target_chunk_found': False,
-        'target_chunk_rank': None,
-        'target_chunk_score': None,
-        'retrieved_chunks': [],
-        'metrics': {},
-        'error_message': None
-    }
+    result = failed_query_result()
     
     try:
         # Find the target chunk
@@ -151,45 +187,38 @@ def evaluate_single_query(query: EvaluationQuery, search_type: str = 'vector',
             return result
         
         # Perform search
-        if searcher is None:
-            searcher = ManPageSearch()
-        chunks = searcher.search_chunks(query.query, search_type, limit, score_threshold)
+        if chunks is None:
+            if searcher is None:
+                searcher = get_searcher()
+            # No full-text fallback: metrics must measure the requested search
+            chunks = searcher.search_chunks(query.query, search_type, limit, score_threshold, fallback=False)
         
         # Extract chunk IDs and scores
-        retrieved_chunk_ids = []
         retrieved_chunks_data = []
+        id_to_rank = {}
         
+        # Ranks are keyed by UUID objects; IDs are only stringified for the
+        # JSON payload stored on the result.
         for i, chunk in enumerate(chunks):
             chunk_data = {
                 'id': str(chunk.id),
                 'rank': i + 1,
                 'score': getattr(chunk, 'similarity', None)
             }
-            retrieved_chunk_ids.append(str(chunk.id))
             retrieved_chunks_data.append(chunk_data)
+            id_to_rank.setdefault(chunk.id, i + 1)
         
         result['retrieved_chunks'] = retrieved_chunks_data
         
         # Check if target chunk was found
-        target_chunk_id = str(target_chunk.id)
-        if target_chunk_id in retrieved_chunk_ids:
+        rank = id_to_rank.get(target_chunk.id)
+        if rank is not None:
             result['target_chunk_found'] = True
-            result['target_chunk_rank'] = retrieved_chunk_ids.index(target_chunk_id) + 1
-            
-            # Find the score for the target chunk
-            for chunk_data in retrieved_chunks_data:
-                if chunk_data['id'] == target_chunk_id:
-                    result['target_chunk_score'] = chunk_data['score']
-                    break
-        
-        # Compute metrics
-        metrics = {}
-        for k in [1, 5, 10, 20]:
-            metrics[f'recall_at_{k}'] = compute_recall_at_k(retrieved_chunk_ids, target_chunk_id, k)
-            metrics[f'ndcg_at_{k}'] = compute_ndcg_at_k(retrieved_chunk_ids, target_chunk_id, k)
+            result['target_chunk_rank'] = rank
+            result['target_chunk_score'] = retrieved_chunks_data[rank - 1]['score']
         
-        metrics['mrr'] = compute_mrr(retrieved_chunk_ids, target_chunk_id)
-        result['metrics'] = metrics
+        # Metrics depend only on the target's rank; callers compute them from
+        # target_chunk_rank (see compute_metrics_from_ranks)
         result['success'] = True
         
     except Exception as e:
@@ -225,64 +254,62 @@ def run_evaluation(name: str, search_type: str = 'vector', score_threshold: floa
     
     try:
         # Get all evaluation queries
-        queries = EvaluationQuery.objects.all()
-        evaluation_run.total_queries = queries.count()
+        queries = list(EvaluationQuery.objects.all())
+        evaluation_run.total_queries = len(queries)
         evaluation_run.save()
         
-        # Initialize searcher once to reuse
-        searcher = ManPageSearch()
+        # Initialize searcher once to reuse, and retrieve results in batches
+        # so embedding and Qdrant searches are batched. Without a full-text
+        # fallback, queries of a failed batch are recorded as failed rather
+        # than scored against a different search.
+        searcher = get_searcher()
+        retrieved = []
+        search_errors = {}
+        for start in range(0, len(queries), EVALUATION_SEARCH_BATCH_SIZE):
+            batch = queries[start:start + EVALUATION_SEARCH_BATCH_SIZE]
+            try:
+                retrieved.extend(searcher.search_chunks_batch(
+                    [query.query for query in batch], search_type, limit, score_threshold, fallback=False
+                ))
+            except Exception as e:
+                for query in batch:
+                    search_errors[query.id] = f"Search failed: {e}"
+                retrieved.extend([None] * len(batch))
         
         # Process each query
         successful_queries = 0
         failed_queries = 0
         
-        all_recall_at_1 = []
-        all_recall_at_5 = []
-        all_recall_at_10 = []
-        all_recall_at_20 = []
-        all_ndcg_at_1 = []
-        all_ndcg_at_5 = []
-        all_ndcg_at_10 = []
-        all_ndcg_at_20 = []
-        all_mrr = []
+        # Target rank (0 if not retrieved) and result of each successful query
+        ranks = np.zeros(len(queries), dtype=np.int64)
+        successful_results = []
+        
+        # Results are buffered and inserted in bulk once all queries have run
+        results_buf = []
         
-        for query in queries:
+        for query, chunks in zip(queries, retrieved):
             # Evaluate the query
-            eval_result = evaluate_single_query(query, search_type, score_threshold, limit, searcher)
+            if query.id in search_errors:
+                eval_result = failed_query_result(search_errors[query.id])
+            else:
+                eval_result = evaluate_single_query(query, search_type, score_threshold, limit, searcher, chunks)
             
-            # Create evaluation result
-            result = EvaluationResult.objects.create(
+            results_buf.append(EvaluationResult(
                 evaluation_run=evaluation_run,
                 query=query,
                 retrieved_chunks=eval_result['retrieved_chunks'],
                 target_chunk_found=eval_result['target_chunk_found'],
                 target_chunk_rank=eval_result['target_chunk_rank'],
                 target_chunk_score=eval_result['target_chunk_score'],
-                recall_at_1=eval_result['metrics'].get('recall_at_1'),
-                recall_at_5=eval_result['metrics'].get('recall_at_5'),
-                recall_at_10=eval_result['metrics'].get('recall_at_10'),
-                recall_at_20=eval_result['metrics'].get('recall_at_20'),
-                ndcg_at_1=eval_result['metrics'].get('ndcg_at_1'),
-                ndcg_at_5=eval_result['metrics'].get('ndcg_at_5'),
-                ndcg_at_10=eval_result['metrics'].get('ndcg_at_10'),
-                ndcg_at_20=eval_result['metrics'].get('ndcg_at_20'),
-                mrr=eval_result['metrics'].get('mrr'),
                 error_message=eval_result['error_message'],
                 success=eval_result['success']
-            )
+            ))
             
             if eval_result['success']:
+                # Collect ranks; metrics are computed in one pass below
+                ranks[successful_queries] = eval_result['target_chunk_rank'] or 0
+                successful_results.append(results_buf[-1])
                 successful_queries += 1
-                # Collect metrics for averaging
-                all_recall_at_1.append(eval_result['metrics'].get('recall_at_1', 0))
-                all_recall_at_5.append(eval_result['metrics'].get('recall_at_5', 0))
-                all_recall_at_10.append(eval_result['metrics'].get('recall_at_10', 0))
-                all_recall_at_20.append(eval_result['metrics'].get('recall_at_20', 0))
-                all_ndcg_at_1.append(eval_result['metrics'].get('ndcg_at_1', 0))
-                all_ndcg_at_5.append(eval_result['metrics'].get('ndcg_at_5', 0))
-                all_ndcg_at_10.append(eval_result['metrics'].get('ndcg_at_10', 0))
-                all_ndcg_at_20.append(eval_result['metrics'].get('ndcg_at_20', 0))
-                all_mrr.append(eval_result['metrics'].get('mrr', 0))
             else:
                 failed_queries += 1
         
@@ -290,20 +317,26 @@ def run_evaluation(name: str, search_type: str = 'vector', score_threshold: floa
         evaluation_run.successful_queries = successful_queries
         evaluation_run.failed_queries = failed_queries
         
-        if all_recall_at_1:
-            evaluation_run.recall_at_1 = sum(all_recall_at_1) / len(all_recall_at_1)
-            evaluation_run.recall_at_5 = sum(all_recall_at_5) / len(all_recall_at_5)
-            evaluation_run.recall_at_10 = sum(all_recall_at_10) / len(all_recall_at_10)
-            evaluation_run.recall_at_20 = sum(all_recall_at_20) / len(all_recall_at_20)
-            evaluation_run.ndcg_at_1 = sum(all_ndcg_at_1) / len(all_ndcg_at_1)
-            evaluation_run.ndcg_at_5 = sum(all_ndcg_at_5) / len(all_ndcg_at_5)
-            evaluation_run.ndcg_at_10 = sum(all_ndcg_at_10) / len(all_ndcg_at_10)
-            evaluation_run.ndcg_at_20 = sum(all_ndcg_at_20) / len(all_ndcg_at_20)
-            evaluation_run.mrr = sum(all_mrr) / len(all_mrr)
+        if successful_queries:
+            metrics = compute_metrics_from_ranks(ranks[:successful_queries])
+            for result, row in zip(successful_results, metrics.tolist()):
+                for field, value in zip(METRIC_FIELDS, row):
+                    setattr(result, field, value)
+            for field, value in zip(METRIC_FIELDS, metrics.mean(axis=0).tolist()):
+                setattr(evaluation_run, field, value)
         
+        evaluation_run.rank_distribution = rank_distribution_from_ranks(
+            result.target_chunk_rank for result in results_buf if result.target_chunk_found
+        )
         evaluation_run.status = 'completed'
         evaluation_run.completed_at = timezone.now()
-        evaluation_run.save()
+        
+        with transaction.atomic():
+            EvaluationResult.objects.bulk_create(results_buf, batch_size=500)
+            evaluation_run.save(update_fields=[
+                'successful_queries', 'failed_queries', 'status', 'completed_at', 'rank_distribution',
+                'updated_at', *METRIC_FIELDS
+            ])
         
     except Exception as e:
         evaluation_run.status = 'failed'
@@ -314,45 +347,57 @@ def run_evaluation(name: str, search_type: str = 'vector', score_threshold: floa
     return evaluation_run
 
 
-def load_evaluation_queries_from_file(file_path: str) -> int:
+def load_evaluation_queries_from_file(file_path: str, chunk_size: int = 1000) -> int:
     """
     Load evaluation queries from a JSONL file.
     
+    Queries whose text already exists in the database (or earlier in the
+    file) are skipped; new ones are inserted with bulk_create in chunks.
+    
     Args:
         file_path: Path to the JSONL file
+        chunk_size: Number of queries inserted per bulk_create call
     
     Returns:
         Number of queries loaded
     """
-    import json
-    
     queries_loaded = 0
+    seen_queries = set(EvaluationQuery.objects.values_list('query', flat=True))
+    pending = []
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            
-            try:
-                data = json.loads(line)
+    with transaction.atomic():
+        with open(file_path, 'rb', buffering=1 << 16) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
                 
-                # Create or update evaluation query
-                query, created = EvaluationQuery.objects.get_or_create(
-                    query=data['query'],
-                    defaults={
-                        'expected_substrings': data['expected_substrings'],
-                        'document_id': data['document_id'],
-                        'target_section': data['target_section'],
-                        'target_anchor': data['target_anchor'],
-                    }
-                )
-                
-                if created:
-                    queries_loaded += 1
+                try:
+                    data = orjson.loads(line)
+                    
+                    if data['query'] in seen_queries:
+                        continue
+                    
+                    pending.append(EvaluationQuery(
+                        query=data['query'],
+                        expected_substrings=data['expected_substrings'],
+                        document_id=data['document_id'],
+                        target_section=data['target_section'],
+                        target_anchor=data['target_anchor'],
+                    ))
+                    seen_queries.add(data['query'])
                     
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"Error parsing line: {line[:100]}... Error: {e}")
-                continue
+                except (orjson.JSONDecodeError, KeyError) as e:
+                    print(f"Error parsing line: {line[:100].decode('utf-8', 'replace')}... Error: {e}")
+                    continue
+                
+                if len(pending) >= chunk_size:
+                    EvaluationQuery.objects.bulk_create(pending, batch_size=chunk_size)
+                    queries_loaded += len(pending)
+                    pending = []
+        
+        if pending:
+            EvaluationQuery.objects.bulk_create(pending, batch_size=chunk_size)
+            queries_loaded += len(pending)
     
     return queries_loaded
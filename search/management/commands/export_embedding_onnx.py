@@ -0,0 +1,94 @@
+import os
+from pathlib import Path
+
+import torch
+from django.core.management.base import BaseCommand, CommandError
+from transformers import AutoModel, AutoTokenizer
+
+
+class _LastHiddenState(torch.nn.Module):
+    """Wrap the embedding model so the exported graph returns only last_hidden_state."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+
+class Command(BaseCommand):
+    help = 'Export the embedding model to ONNX for serving with ONNX Runtime (set EMBEDDING_ONNX_PATH to use it)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            type=str,
+            default=os.getenv('EMBEDDING_MODEL', 'jinaai/jina-embeddings-v2-small-en'),
+            help='Hugging Face model name to export'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            default='data/models/jina-embeddings.onnx',
+            help='Path of the exported ONNX model'
+        )
+        parser.add_argument(
+            '--opset',
+            type=int,
+            default=17,
+            help='ONNX opset version'
+        )
+        parser.add_argument(
+            '--quantize',
+            action='store_true',
+            help='Also write an INT8 dynamically quantized copy next to the export (<output>.int8.onnx); '
+                 'validate Recall@5 with run_evaluation before switching EMBEDDING_ONNX_PATH to it'
+        )
+
+    def handle(self, *args, **options):
+        output_path = Path(options['output'])
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.stdout.write(f"Loading {options['model']}...")
+        try:
+            model = AutoModel.from_pretrained(options['model'], trust_remote_code=True)
+            tokenizer = AutoTokenizer.from_pretrained(options['model'])
+        except Exception as e:
+            raise CommandError(f"Could not load model: {e}")
+
+        model.eval()
+        sample = tokenizer(['export sample', 'a slightly longer export sample'], return_tensors='pt', padding=True)
+
+        self.stdout.write(f"Exporting to {output_path}...")
+        with torch.no_grad():
+            torch.onnx.export(
+                _LastHiddenState(model),
+                (sample['input_ids'], sample['attention_mask']),
+                str(output_path),
+                input_names=['input_ids', 'attention_mask'],
+                output_names=['last_hidden_state'],
+                dynamic_axes={
+                    'input_ids': {0: 'batch', 1: 'sequence'},
+                    'attention_mask': {0: 'batch', 1: 'sequence'},
+                    'last_hidden_state': {0: 'batch', 1: 'sequence'},
+                },
+                opset_version=options['opset'],
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Exported ONNX model to {output_path}"))
+
+        if options['quantize']:
+            self._quantize(output_path)
+
+    def _quantize(self, model_path):
+        """Write an INT8 dynamically quantized copy of model_path."""
+        try:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+        except ImportError:
+            raise CommandError("onnxruntime is required for --quantize. Please pip install onnxruntime.")
+
+        quantized_path = model_path.with_suffix('.int8.onnx')
+        self.stdout.write(f"Quantizing to {quantized_path}...")
+        quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+        self.stdout.write(self.style.SUCCESS(f"Wrote INT8 model to {quantized_path}"))
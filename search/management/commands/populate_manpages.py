@@ -1,11 +1,12 @@
-import json
 from pathlib import Path
 
+import orjson
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
 from search.models import Document, Chunk
-from search.qdrant_service import QdrantService
+from search.qdrant_service import QdrantService, get_qdrant_service, DEFAULT_ENCODE_BATCH_SIZE, DEFAULT_UPSERT_BATCH_SIZE
+from search.search import refresh_section_stats
 
 
 class Command(BaseCommand):
@@ -24,10 +25,24 @@ class Command(BaseCommand):
             help='Clear existing data before importing'
         )
         parser.add_argument(
+            '--db-batch-size',
             '--batch-size',
+            dest='db_batch_size',
             type=int,
             default=1000,
-            help='Number of chunks to process in each batch'
+            help='Number of chunks written to the database per transaction'
+        )
+        parser.add_argument(
+            '--encode-batch-size',
+            type=int,
+            default=DEFAULT_ENCODE_BATCH_SIZE,
+            help='Number of chunks embedded per model forward pass (64-512 is usually fastest on CPU)'
+        )
+        parser.add_argument(
+            '--upsert-batch-size',
+            type=int,
+            default=DEFAULT_UPSERT_BATCH_SIZE,
+            help='Number of points sent to Qdrant per upsert request'
         )
 
     def handle(self, *args, **options):
@@ -40,7 +55,7 @@ class Command(BaseCommand):
         
         # Initialize Qdrant service
         try:
-            qdrant_service = QdrantService()
+            qdrant_service = get_qdrant_service()
             self.stdout.write(self.style.SUCCESS('Connected to Qdrant.'))
         except Exception as e:
             self.stdout.write(self.style.WARNING(f'Could not connect to Qdrant: {e}'))
@@ -51,19 +66,25 @@ class Command(BaseCommand):
             self.stdout.write('Clearing existing data...')
             Chunk.objects.all().delete()
             Document.objects.all().delete()
+            # Search results are built from Qdrant payloads, so points of
+            # deleted chunks must go too
+            if qdrant_service:
+                qdrant_service.recreate_collection()
             self.stdout.write(self.style.SUCCESS('Existing data cleared.'))
         
         self.stdout.write(f'Reading data from {file_path}...')
         
         documents = {}
         chunks_to_create = []
-        batch_size = options['batch_size']
+        batch_size = options['db_batch_size']
+        self.encode_batch_size = options['encode_batch_size']
+        self.upsert_batch_size = options['upsert_batch_size']
         processed_count = 0
         
-        with open(file_path, 'r', encoding='utf-8') as f:
+        with open(file_path, 'rb', buffering=1 << 16) as f:
             for line_num, line in enumerate(f, 1):
                 try:
-                    data = json.loads(line.strip())
+                    data = orjson.loads(line)
                     
                     # Parse document_id to extract document info
                     # Format: "man:6.9:getent:1"
@@ -118,7 +139,7 @@ class Command(BaseCommand):
                         chunks_to_create = []
                         self.stdout.write(f'Processed {processed_count} chunks...')
                 
-                except json.JSONDecodeError as e:
+                except orjson.JSONDecodeError as e:
                     self.stdout.write(
                         self.style.WARNING(f'Skipping line {line_num}: JSON decode error - {e}')
                     )
@@ -133,6 +154,8 @@ class Command(BaseCommand):
         if chunks_to_create:
             self._process_batch(documents, chunks_to_create, qdrant_service)
         
+        refresh_section_stats()
+        
         self.stdout.write(
             self.style.SUCCESS(f'Successfully processed {processed_count} chunks from {processed_count} lines.')
         )
@@ -146,57 +169,48 @@ class Command(BaseCommand):
                 ignore_conflicts=True
             )
             
-            # Get the created documents for foreign key relationships
-            created_docs = {}
-            for doc_key, doc in documents.items():
-                try:
-                    created_doc = Document.objects.get(
-                        name=doc.name,
-                        section=doc.section,
-                        version_tag=doc.version_tag
-                    )
-                    created_docs[doc_key] = created_doc
-                except Document.DoesNotExist:
-                    continue
+            # Get the stored documents for foreign key relationships in one
+            # query; rows that already existed keep their original IDs
+            names = {doc.name for doc in documents.values()}
+            created_docs = {
+                (doc.name, doc.section, doc.version_tag): doc
+                for doc in Document.objects.filter(name__in=names)
+                if (doc.name, doc.section, doc.version_tag) in documents
+            }
             
-            # Update chunk documents with created document instances
+            # Point chunks at the stored documents and build the Qdrant items
+            # in the same pass
+            items = []
             for chunk in chunks_to_create:
                 doc_key = (chunk.document.name, chunk.document.section, chunk.document.version_tag)
                 if doc_key in created_docs:
                     chunk.document = created_docs[doc_key]
+                if qdrant_service:
+                    items.append((str(chunk.id), chunk.text, QdrantService.metadata_for_chunk(chunk)))
             
             # Bulk create chunks
             Chunk.objects.bulk_create(chunks_to_create, ignore_conflicts=True)
             
             # Index chunks in Qdrant if service is available
             if qdrant_service:
-                self._index_chunks_in_qdrant(chunks_to_create, qdrant_service)
+                self._index_chunks_in_qdrant(chunks_to_create, items, qdrant_service)
     
-    def _index_chunks_in_qdrant(self, chunks, qdrant_service):
-        """Index chunks in Qdrant vector database."""
-        for chunk in chunks:
-            try:
-                metadata = {
-                    'document_name': chunk.document.name,
-                    'document_section': chunk.document.section,
-                    'document_title': chunk.document.title,
-                    'section_name': chunk.section_name,
-                    'anchor': chunk.anchor,
-                    'token_count': chunk.token_count,
-                    'version_tag': chunk.document.version_tag
-                }
-                
-                qdrant_id = qdrant_service.add_chunk(
-                    chunk_id=str(chunk.id),
-                    text=chunk.text,
-                    metadata=metadata
-                )
-                
-                # Update chunk with Qdrant ID
-                chunk.qdrant_id = qdrant_id
-                chunk.save(update_fields=['qdrant_id'])
-                
-            except Exception as e:
-                self.stdout.write(
-                    self.style.WARNING(f'Failed to index chunk {chunk.id} in Qdrant: {e}')
-                )
+    def _index_chunks_in_qdrant(self, chunks, items, qdrant_service):
+        """Index chunks in Qdrant vector database from prebuilt (chunk_id, text, metadata) items."""
+        try:
+            qdrant_ids = qdrant_service.add_chunks(
+                items,
+                encode_batch_size=self.encode_batch_size,
+                upsert_batch_size=self.upsert_batch_size
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.WARNING(f'Failed to index {len(chunks)} chunks in Qdrant: {e}')
+            )
+            return
+        
+        # Record Qdrant IDs in memory, then persist them in bulk
+        for chunk, qdrant_id in zip(chunks, qdrant_ids):
+            chunk.qdrant_id = qdrant_id
+        
+        Chunk.objects.bulk_update(chunks, ['qdrant_id'], batch_size=500)
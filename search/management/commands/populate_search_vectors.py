@@ -2,7 +2,7 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 
 from search.models import Chunk
-from search.qdrant_service import QdrantService
+from search.qdrant_service import QdrantService, get_qdrant_service, DEFAULT_ENCODE_BATCH_SIZE, DEFAULT_UPSERT_BATCH_SIZE
 
 
 class Command(BaseCommand):
@@ -10,18 +10,34 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument(
+            '--db-batch-size',
             '--batch-size',
+            dest='db_batch_size',
             type=int,
-            default=100,
-            help='Number of chunks to process in each batch'
+            default=1000,
+            help='Number of chunks read and updated in the database per batch'
+        )
+        parser.add_argument(
+            '--encode-batch-size',
+            type=int,
+            default=DEFAULT_ENCODE_BATCH_SIZE,
+            help='Number of chunks embedded per model forward pass (64-512 is usually fastest on CPU)'
+        )
+        parser.add_argument(
+            '--upsert-batch-size',
+            type=int,
+            default=DEFAULT_UPSERT_BATCH_SIZE,
+            help='Number of points sent to Qdrant per upsert request'
         )
 
     def handle(self, *args, **options):
-        batch_size = options['batch_size']
+        batch_size = options['db_batch_size']
+        encode_batch_size = options['encode_batch_size']
+        upsert_batch_size = options['upsert_batch_size']
         
         # Initialize Qdrant service
         try:
-            qdrant_service = QdrantService()
+            qdrant_service = get_qdrant_service()
             self.stdout.write(self.style.SUCCESS('Connected to Qdrant.'))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Could not connect to Qdrant: {e}'))
@@ -30,7 +46,7 @@ class Command(BaseCommand):
         self.stdout.write('Populating Qdrant vectors...')
         
         # Get chunks that don't have Qdrant IDs yet
-        chunks_without_vectors = Chunk.objects.filter(qdrant_id__isnull=True)
+        chunks_without_vectors = Chunk.objects.filter(qdrant_id__isnull=True).select_related('document').order_by('id')
         total_chunks = chunks_without_vectors.count()
         
         if total_chunks == 0:
@@ -40,44 +56,46 @@ class Command(BaseCommand):
         self.stdout.write(f'Found {total_chunks} chunks without Qdrant vectors.')
         
         processed = 0
+        last_id = None
         
-        # Process in batches
+        # Process in batches, paging by primary key so that chunks indexed in
+        # earlier batches don't shift the window
         while processed < total_chunks:
-            batch = chunks_without_vectors[processed:processed + batch_size]
+            page = chunks_without_vectors
+            if last_id is not None:
+                page = page.filter(id__gt=last_id)
+            batch = list(page[:batch_size])
             batch_size_actual = len(batch)
             
             if batch_size_actual == 0:
                 break
             
+            last_id = batch[-1].id
             successful_in_batch = 0
             
-            with transaction.atomic():
-                for chunk in batch:
-                    try:
-                        metadata = {
-                            'document_name': chunk.document.name,
-                            'document_section': chunk.document.section,
-                            'document_title': chunk.document.title,
-                            'section_name': chunk.section_name,
-                            'anchor': chunk.anchor,
-                            'token_count': chunk.token_count,
-                            'version_tag': chunk.document.version_tag
-                        }
-                        
-                        qdrant_id = qdrant_service.add_chunk(
-                            chunk_id=str(chunk.id),
-                            text=chunk.text,
-                            metadata=metadata
-                        )
-                        
-                        chunk.qdrant_id = qdrant_id
-                        chunk.save(update_fields=['qdrant_id'])
-                        successful_in_batch += 1
-                        
-                    except Exception as e:
-                        self.stdout.write(
-                            self.style.WARNING(f'Failed to index chunk {chunk.id}: {e}')
-                        )
+            items = [
+                (str(chunk.id), chunk.text, QdrantService.metadata_for_chunk(chunk))
+                for chunk in batch
+            ]
+            
+            try:
+                qdrant_ids = qdrant_service.add_chunks(
+                    items,
+                    encode_batch_size=encode_batch_size,
+                    upsert_batch_size=upsert_batch_size
+                )
+                
+                for chunk, qdrant_id in zip(batch, qdrant_ids):
+                    chunk.qdrant_id = qdrant_id
+                
+                with transaction.atomic():
+                    Chunk.objects.bulk_update(batch, ['qdrant_id'], batch_size=500)
+                successful_in_batch = len(qdrant_ids)
+                
+            except Exception as e:
+                self.stdout.write(
+                    self.style.WARNING(f'Failed to index batch of {batch_size_actual} chunks: {e}')
+                )
             
             processed += batch_size_actual
             self.stdout.write(f'Processed {processed}/{total_chunks} chunks... (Successfully indexed: {successful_in_batch}/{batch_size_actual} in this batch)')
@@ -35,7 +35,7 @@ class Command(BaseCommand):
             '--search-type',
             type=str,
             default='vector',
-            choices=['vector', 'hybrid'],
+            choices=['vector', 'vector_fast', 'hybrid'],
             help='Type of search to use'
         )
         
@@ -59,6 +59,20 @@ class Command(BaseCommand):
             default='jinaai/jina-embeddings-v2-small-en',
             help='Embedding model to use'
         )
+        
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=100,
+            help='Number of evaluation runs to show (for list action)'
+        )
+        
+        parser.add_argument(
+            '--offset',
+            type=int,
+            default=0,
+            help='Number of most recent runs to skip (for list action)'
+        )
 
     def handle(self, *args, **options):
         action = options['action']
@@ -68,7 +82,7 @@ class Command(BaseCommand):
         elif action == 'run':
             self.run_evaluation(options)
         elif action == 'list':
-            self.list_runs()
+            self.list_runs(options)
 
     def load_queries(self, options):
         """Load evaluation queries from JSONL file"""
@@ -146,34 +160,42 @@ class Command(BaseCommand):
         except Exception as e:
             raise CommandError(f"Error running evaluation: {e}")
 
-    def list_runs(self):
-        """List all evaluation runs"""
+    def list_runs(self, options):
+        """List the most recent evaluation runs"""
         from search.models import EvaluationRun
         
-        runs = EvaluationRun.objects.all().order_by('-created_at')
+        offset = options['offset']
+        runs = list(
+            EvaluationRun.objects.only(
+                'id', 'name', 'status', 'created_at', 'completed_at',
+                'successful_queries', 'total_queries', 'recall_at_5', 'ndcg_at_5', 'mrr'
+            ).order_by('-created_at')[offset:offset + options['runs']]
+        )
         
-        if not runs.exists():
+        if not runs:
             self.stdout.write("No evaluation runs found.")
             return
         
-        self.stdout.write("Evaluation Runs:")
-        self.stdout.write("-" * 80)
+        # Build the whole listing first and write it in one call
+        lines = ["Evaluation Runs:", "-" * 80]
         
         for run in runs:
             status_color = self.style.SUCCESS if run.status == 'completed' else \
                           self.style.WARNING if run.status == 'running' else \
                           self.style.ERROR
             
-            self.stdout.write(f"ID: {run.id}")
-            self.stdout.write(f"Name: {run.name}")
-            self.stdout.write(f"Status: {status_color(run.status)}")
-            self.stdout.write(f"Created: {run.created_at}")
+            lines.append(f"ID: {run.id}")
+            lines.append(f"Name: {run.name}")
+            lines.append(f"Status: {status_color(run.status)}")
+            lines.append(f"Created: {run.created_at}")
             
             if run.status == 'completed':
-                self.stdout.write(f"Completed: {run.completed_at}")
-                self.stdout.write(f"Queries: {run.successful_queries}/{run.total_queries}")
-                self.stdout.write(f"Recall@5: {run.recall_at_5:.4f}")
-                self.stdout.write(f"nDCG@5: {run.ndcg_at_5:.4f}")
-                self.stdout.write(f"MRR: {run.mrr:.4f}")
+                lines.append(f"Completed: {run.completed_at}")
+                lines.append(f"Queries: {run.successful_queries}/{run.total_queries}")
+                lines.append(f"Recall@5: {run.recall_at_5:.4f}")
+                lines.append(f"nDCG@5: {run.ndcg_at_5:.4f}")
+                lines.append(f"MRR: {run.mrr:.4f}")
             
-            self.stdout.write("-" * 80)
+            lines.append("-" * 80)
+        
+        self.stdout.write("\n".join(lines))
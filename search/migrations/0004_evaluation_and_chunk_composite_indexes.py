@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-15 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0003_alter_evaluationresult_error_message'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chunk',
+            index=models.Index(fields=['document', 'qdrant_id'], name='search_chun_documen_19a484_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluationresult',
+            index=models.Index(fields=['evaluation_run', 'success', 'target_chunk_rank'], name='search_eval_evaluat_d37f58_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluationresult',
+            index=models.Index(fields=['evaluation_run', 'target_chunk_found'], name='search_eval_evaluat_534c4a_idx'),
+        ),
+    ]
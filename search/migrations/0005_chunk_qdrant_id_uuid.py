@@ -0,0 +1,81 @@
+import uuid
+
+from django.db import migrations, models
+
+
+def copy_qdrant_ids_to_uuid(apps, schema_editor):
+    """Parse the stored string point IDs into the new UUID column."""
+    Chunk = apps.get_model('search', 'Chunk')
+    batch = []
+    for chunk in Chunk.objects.filter(qdrant_id__isnull=False).only('id', 'qdrant_id').iterator(chunk_size=2000):
+        try:
+            chunk.qdrant_uuid = uuid.UUID(chunk.qdrant_id)
+        except ValueError:
+            # Not a UUID point ID; leave it empty so populate_search_vectors re-indexes it
+            continue
+        batch.append(chunk)
+        if len(batch) >= 2000:
+            Chunk.objects.bulk_update(batch, ['qdrant_uuid'])
+            batch = []
+    if batch:
+        Chunk.objects.bulk_update(batch, ['qdrant_uuid'])
+
+
+def copy_qdrant_uuids_to_string(apps, schema_editor):
+    """Write the UUID point IDs back into the string column."""
+    Chunk = apps.get_model('search', 'Chunk')
+    batch = []
+    for chunk in Chunk.objects.filter(qdrant_uuid__isnull=False).only('id', 'qdrant_uuid').iterator(chunk_size=2000):
+        chunk.qdrant_id = str(chunk.qdrant_uuid)
+        batch.append(chunk)
+        if len(batch) >= 2000:
+            Chunk.objects.bulk_update(batch, ['qdrant_id'])
+            batch = []
+    if batch:
+        Chunk.objects.bulk_update(batch, ['qdrant_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0004_evaluation_and_chunk_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunk',
+            name='qdrant_uuid',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.RunPython(copy_qdrant_ids_to_uuid, copy_qdrant_uuids_to_string),
+        migrations.RemoveIndex(
+            model_name='chunk',
+            name='search_chun_qdrant__c4935d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='chunk',
+            name='search_chun_documen_19a484_idx',
+        ),
+        migrations.RemoveField(
+            model_name='chunk',
+            name='qdrant_id',
+        ),
+        migrations.RenameField(
+            model_name='chunk',
+            old_name='qdrant_uuid',
+            new_name='qdrant_id',
+        ),
+        migrations.AlterField(
+            model_name='chunk',
+            name='qdrant_id',
+            field=models.UUIDField(blank=True, help_text='Qdrant vector ID', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=models.Index(fields=['qdrant_id'], name='search_chun_qdrant__c4935d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=models.Index(fields=['document', 'qdrant_id'], name='search_chun_documen_19a484_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-15 06:23
+
+import search.uuid7
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0005_chunk_qdrant_id_uuid'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chunk',
+            name='id',
+            field=models.UUIDField(default=search.uuid7.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='id',
+            field=models.UUIDField(default=search.uuid7.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='evaluationquery',
+            name='id',
+            field=models.UUIDField(default=search.uuid7.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='evaluationresult',
+            name='id',
+            field=models.UUIDField(default=search.uuid7.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='evaluationrun',
+            name='id',
+            field=models.UUIDField(default=search.uuid7.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-15 06:29
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0006_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunk',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('section_name', 'text', config='simple'), help_text='Full-text search vector of the section name and text', output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='search_chun_search__7eb777_gin'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-15 06:33
+
+import search.uuid7
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_section_stats(apps, schema_editor):
+    """Count the chunks already imported per section name."""
+    Chunk = apps.get_model('search', 'Chunk')
+    SectionStats = apps.get_model('search', 'SectionStats')
+    SectionStats.objects.bulk_create([
+        SectionStats(section_name=row['section_name'], count=row['count'])
+        for row in Chunk.objects.values('section_name').annotate(count=Count('id')).order_by()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0007_chunk_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectionStats',
+            fields=[
+                ('id', models.UUIDField(default=search.uuid7.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('section_name', models.CharField(help_text="Section name (e.g., 'NAME', 'SYNOPSIS')", max_length=100, unique=True)),
+                ('count', models.PositiveIntegerField(help_text='Number of chunks in this section')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=models.Index(fields=['section_name'], name='search_chun_section_8ca57b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sectionstats',
+            index=models.Index(fields=['-count'], name='search_sect_count_ea0aca_idx'),
+        ),
+        migrations.RunPython(fill_section_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-15 06:40
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def fill_rank_distributions(apps, schema_editor):
+    """Store the rank distribution of runs that already completed, in buckets of 5 ranks."""
+    EvaluationRun = apps.get_model('search', 'EvaluationRun')
+    EvaluationResult = apps.get_model('search', 'EvaluationResult')
+    runs = list(EvaluationRun.objects.filter(status='completed').only('id'))
+    for run in runs:
+        buckets = EvaluationResult.objects.filter(
+            evaluation_run=run, target_chunk_found=True, target_chunk_rank__gte=1
+        ).annotate(
+            bucket=(F('target_chunk_rank') - 1) / 5
+        ).values('bucket').annotate(count=Count('id')).order_by('bucket')
+        run.rank_distribution = [
+            [f"{row['bucket'] * 5 + 1}-{(row['bucket'] + 1) * 5}", row['count']] for row in buckets
+        ]
+    EvaluationRun.objects.bulk_update(runs, ['rank_distribution'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0008_section_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluationrun',
+            name='rank_distribution',
+            field=models.JSONField(blank=True, help_text='[bucket label, count] pairs of target chunk ranks, stored when the run completes', null=True),
+        ),
+        migrations.RunPython(fill_rank_distributions, migrations.RunPython.noop),
+    ]
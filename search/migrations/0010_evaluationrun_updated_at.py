@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-15 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0009_evaluationrun_rank_distribution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluationrun',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
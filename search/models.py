@@ -1,11 +1,14 @@
-import uuid
-
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 
+from search.uuid7 import uuid7
+
 
 class Document(models.Model):
     """Represents a man-page document."""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=255, help_text="Name of the man-page (e.g., 'getent')")
     section = models.CharField(max_length=10, help_text="Man page section (e.g., '1', '2', '3')")
     title = models.CharField(max_length=1000, help_text="Full title of the man-page")
@@ -27,30 +30,55 @@ class Document(models.Model):
 
 class Chunk(models.Model):
     """Represents a chunk of text from a man-page document."""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='chunks')
     section_name = models.CharField(max_length=100, help_text="Section name (e.g., 'NAME', 'SYNOPSIS')")
     anchor = models.CharField(max_length=200, help_text="Anchor identifier for the chunk")
     text = models.TextField(help_text="The actual text content of the chunk")
     token_count = models.PositiveIntegerField(help_text="Number of tokens in the text")
-    qdrant_id = models.CharField(max_length=100, null=True, blank=True, help_text="Qdrant vector ID")
+    qdrant_id = models.UUIDField(null=True, blank=True, help_text="Qdrant vector ID")
     embedding_model = models.CharField(max_length=50, default='jinaai/jina-embeddings-v2-small-en', help_text="Embedding model used")
+    search_vector = models.GeneratedField(
+        expression=SearchVector('section_name', 'text', config=settings.POSTGRES_FULL_TEXT_SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        help_text="Full-text search vector of the section name and text"
+    )
     
     class Meta:
         indexes = [
             models.Index(fields=['document', 'section_name']),
+            models.Index(fields=['section_name']),
             models.Index(fields=['anchor']),
             models.Index(fields=['token_count']),
             models.Index(fields=['qdrant_id']),
+            models.Index(fields=['document', 'qdrant_id']),
+            GinIndex(fields=['search_vector']),
         ]
     
     def __str__(self):
         return f"{self.document.name}({self.document.section}) - {self.section_name} - {self.anchor[:50]}..."
 
 
+class SectionStats(models.Model):
+    """Number of chunks per section name, refreshed after each import."""
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    section_name = models.CharField(max_length=100, unique=True, help_text="Section name (e.g., 'NAME', 'SYNOPSIS')")
+    count = models.PositiveIntegerField(help_text="Number of chunks in this section")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-count']),
+        ]
+    
+    def __str__(self):
+        return f"{self.section_name}: {self.count}"
+
+
 class EvaluationQuery(models.Model):
     """Represents a single evaluation query from the eval dataset."""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     query = models.TextField(help_text="The evaluation query text")
     expected_substrings = models.JSONField(help_text="List of expected substrings that should be found")
     document_id = models.CharField(max_length=200, help_text="Target document ID from eval data")
@@ -71,13 +99,14 @@ class EvaluationQuery(models.Model):
 
 class EvaluationRun(models.Model):
     """Represents a complete evaluation run with results and metrics."""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=200, help_text="Name/description of this evaluation run")
     search_type = models.CharField(max_length=50, default='vector', help_text="Type of search used")
     score_threshold = models.FloatField(default=0.7, help_text="Score threshold used for search")
     limit = models.PositiveIntegerField(default=20, help_text="Maximum number of results returned")
     embedding_model = models.CharField(max_length=100, help_text="Embedding model used")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=[
         ('running', 'Running'),
@@ -95,6 +124,10 @@ class EvaluationRun(models.Model):
     ndcg_at_10 = models.FloatField(null=True, blank=True)
     ndcg_at_20 = models.FloatField(null=True, blank=True)
     mrr = models.FloatField(null=True, blank=True)
+    rank_distribution = models.JSONField(
+        null=True, blank=True,
+        help_text="[bucket label, count] pairs of target chunk ranks, stored when the run completes"
+    )
     
     # Summary stats
     total_queries = models.PositiveIntegerField(default=0)
@@ -115,7 +148,7 @@ class EvaluationRun(models.Model):
 
 class EvaluationResult(models.Model):
     """Represents the result of a single query evaluation."""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     evaluation_run = models.ForeignKey(EvaluationRun, on_delete=models.CASCADE, related_name='results')
     query = models.ForeignKey(EvaluationQuery, on_delete=models.CASCADE, related_name='results')
     
@@ -147,6 +180,8 @@ class EvaluationResult(models.Model):
             models.Index(fields=['evaluation_run', 'query']),
             models.Index(fields=['target_chunk_found']),
             models.Index(fields=['success']),
+            models.Index(fields=['evaluation_run', 'success', 'target_chunk_rank']),
+            models.Index(fields=['evaluation_run', 'target_chunk_found']),
         ]
         unique_together = ['evaluation_run', 'query']
     
@@ -1,97 +1,629 @@
+import functools
+import hashlib
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
 import uuid
 from typing import List, Dict, Any, Optional
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
-from qdrant_client.http.exceptions import UnexpectedResponse
-from transformers import AutoModel
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, SearchParams, QuantizationSearchParams,
+    HnswConfigDiff, OptimizersConfigDiff, Datatype, SearchRequest,
+)
+from transformers import AutoModel, AutoTokenizer
+import numpy as np
 import torch
 from django.conf import settings
+from django.core.cache import caches
+
+try:
+    import onnxruntime as ort
+except ImportError:  # Only needed when EMBEDDING_ONNX_PATH is set
+    ort = None
+
+
+# Default batch sizes for bulk indexing. Encoder throughput on CPU tops out
+# around a few hundred texts per forward pass; Qdrant accepts much larger
+# upserts, so points are flushed in bigger groups than they are encoded.
+DEFAULT_ENCODE_BATCH_SIZE = 128
+DEFAULT_UPSERT_BATCH_SIZE = 512
+
+# Token batches are padded up to a multiple of this length, so the model
+# sees a small set of repeating tensor shapes and ONNX Runtime can reuse
+# its memory plans between calls.
+PAD_TO_MULTIPLE_OF = 64
+
+# Number of recent query embeddings kept in memory per process
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+
+# Concurrent single searches (search page and Search API) are coalesced
+# into one Qdrant batch request: a search arriving while no other is waiting
+# is sent right away; otherwise a batch is sent once it holds
+# SEARCH_BATCH_MAX_SIZE searches or SEARCH_BATCH_WINDOW seconds after its
+# first search arrived. QDRANT_SEARCH_BATCH_WINDOW_MS=0 disables coalescing.
+SEARCH_BATCH_MAX_SIZE = 16
+SEARCH_BATCH_WINDOW = float(os.getenv('QDRANT_SEARCH_BATCH_WINDOW_MS', '8')) / 1000
+# Seconds a coalesced search waits for its batch before giving up
+SEARCH_BATCH_TIMEOUT = 30
+
+# Queries per Qdrant batch request in search_similar_batch; responses carry
+# the payload text of every hit, so batches are bounded to stay well under
+# the gRPC message size limit
+SEARCH_BATCH_REQUEST_SIZE = 64
+
+# Jina embeddings v2 small produces 512-dim vectors. The model is trained
+# with Matryoshka representation learning, so VECTOR_DIM may be lowered
+# (e.g. 256) to store truncated, re-normalised vectors; changing it
+# recreates the collection and requires re-running populate_search_vectors.
+MODEL_DIMENSION = 512
+VECTOR_DIM = int(os.getenv('VECTOR_DIM', str(MODEL_DIMENSION)))
+
+# Stored vectors are scalar-quantized to int8 (4x smaller, SIMD scoring);
+# searches oversample candidates in int8 and rescore them with the
+# original vectors so ranking quality is preserved.
+QUANTIZATION_CONFIG = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+)
+# HNSW graph tuned for a read-heavy corpus: a denser graph and a wider
+# build-time beam cost more once at indexing time and buy recall at a
+# lower search-time ef. QDRANT_HNSW_EF trades search latency for recall.
+HNSW_CONFIG = HnswConfigDiff(m=32, ef_construct=256, full_scan_threshold=10000)
+OPTIMIZERS_CONFIG = OptimizersConfigDiff(indexing_threshold=20000)
+HNSW_EF = int(os.getenv('QDRANT_HNSW_EF', '64'))
+
+QUANTIZATION_OVERSAMPLING = 2.0
+
+
+@functools.lru_cache(maxsize=64)
+def search_params(hnsw_ef: Optional[int] = None, oversampling: Optional[float] = None,
+                  rescore: bool = True) -> SearchParams:
+    """
+    Return search parameters using the int8 index.
+    
+    Args:
+        hnsw_ef: HNSW beam width (defaults to HNSW_EF)
+        oversampling: Candidates fetched from the int8 index per requested
+            result before rescoring (defaults to QUANTIZATION_OVERSAMPLING)
+        rescore: Rescore candidates with the original vectors; without it,
+            results and scores come from the in-RAM int8 index alone and no
+            on-disk vectors are read
+    """
+    return SearchParams(
+        hnsw_ef=hnsw_ef or HNSW_EF,
+        quantization=QuantizationSearchParams(
+            ignore=False,
+            rescore=rescore,
+            oversampling=(oversampling or QUANTIZATION_OVERSAMPLING) if rescore else None
+        )
+    )
+
+
+SEARCH_PARAMS = search_params()
+
+# Process-wide caches so the embedding model is loaded and the Qdrant
+# connection is opened only once per worker, even across threads.
+_lock = threading.RLock()
+_embedding_models: Dict[str, Any] = {}
+_tokenizers: Dict[str, Any] = {}
+_onnx_sessions: Dict[str, Any] = {}
+_qdrant_client: Optional[QdrantClient] = None
+_shared_service: Optional['QdrantService'] = None
+_checked_collections = set()
+_search_batchers: Dict[str, 'SearchBatcher'] = {}
+
+
+def _cpu_supports_bf16() -> bool:
+    """Return True when the CPU has native BF16 matmul (AVX-512 BF16) for oneDNN to use."""
+    if not torch.backends.mkldnn.is_available():
+        return False
+    probe = getattr(torch.cpu, '_is_cpu_support_avx512_bf16', None)
+    return bool(probe and probe())
+
+
+def _get_embedding_model(model_name: str):
+    """Return the embedding model for model_name, loading it on first use."""
+    with _lock:
+        if model_name not in _embedding_models:
+            torch.set_num_threads(os.cpu_count() or 1)
+            model = AutoModel.from_pretrained(
+                model_name,
+                trust_remote_code=True
+            )
+            # BF16 weights halve memory traffic and use the CPU's BF16 matmul
+            # units; hidden states are cast back to FP32 before pooling.
+            if os.getenv('EMBEDDING_BF16', '1') != '0' and _cpu_supports_bf16():
+                model = model.to(torch.bfloat16)
+            _embedding_models[model_name] = model.eval()
+        return _embedding_models[model_name]
+
+
+def _get_tokenizer(model_name: str):
+    """Return a standalone tokenizer for model_name, loading it on first use."""
+    with _lock:
+        if model_name not in _tokenizers:
+            _tokenizers[model_name] = AutoTokenizer.from_pretrained(model_name)
+        return _tokenizers[model_name]
+
+
+def _get_onnx_session(model_path: str):
+    """Return an ONNX Runtime session for the exported embedding model at model_path."""
+    if ort is None:
+        raise RuntimeError("onnxruntime is required when EMBEDDING_ONNX_PATH is set. Please pip install onnxruntime.")
+    with _lock:
+        if model_path not in _onnx_sessions:
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.intra_op_num_threads = os.cpu_count() or 1
+            options.enable_mem_pattern = True
+            options.enable_cpu_mem_arena = True
+            # Keep intra-op workers spinning between calls; helps the many
+            # small int8 GEMMs of a quantized model on VNNI/AMX CPUs
+            options.add_session_config_entry('session.intra_op.allow_spinning', '1')
+            providers = ['CPUExecutionProvider']
+            if 'CUDAExecutionProvider' in ort.get_available_providers():
+                providers.insert(0, 'CUDAExecutionProvider')
+            _onnx_sessions[model_path] = ort.InferenceSession(model_path, sess_options=options, providers=providers)
+        return _onnx_sessions[model_path]
+
+
+def _get_qdrant_client() -> QdrantClient:
+    """Return the shared Qdrant client, creating it on first use."""
+    global _qdrant_client
+    with _lock:
+        if _qdrant_client is None:
+            # gRPC keeps one persistent HTTP/2 channel and avoids JSON
+            # encoding of vectors; QDRANT_PREFER_GRPC=false falls back to REST
+            _qdrant_client = QdrantClient(
+                host=os.getenv('QDRANT_HOST', 'localhost'),
+                port=int(os.getenv('QDRANT_PORT', '6333')),
+                grpc_port=int(os.getenv('QDRANT_GRPC_PORT', '6334')),
+                prefer_grpc=os.getenv('QDRANT_PREFER_GRPC', 'true').lower() != 'false',
+            )
+        return _qdrant_client
+
+
+@functools.lru_cache(maxsize=256)
+def _build_filter(items: tuple) -> Optional[Filter]:
+    """Build a Filter matching every (key, value) pair in items."""
+    if not items:
+        return None
+    return Filter(must=[FieldCondition(key=key, match=MatchValue(value=value)) for key, value in items])
+
+
+def build_filter(filters: Optional[Dict[str, Any]]) -> Optional[Filter]:
+    """
+    Return the Qdrant Filter requiring each payload field in filters to equal its value.
+    
+    Filters are cached by their items, so repeated searches with the same
+    filter share one Filter instance; treat the result as read-only.
+    """
+    return _build_filter(tuple(sorted((filters or {}).items())))
+
+
+class SearchBatcher:
+    """
+    Coalesce concurrent searches on one collection into Qdrant batch requests.
+    
+    Callers block in search() while a background thread collects requests
+    and sends them in a single search_batch call. A request that finds the
+    queue empty is sent on its own without waiting; otherwise requests are
+    collected for up to SEARCH_BATCH_WINDOW seconds (or SEARCH_BATCH_MAX_SIZE
+    requests).
+    """
+    
+    def __init__(self, client: QdrantClient, collection_name: str,
+                 window: float = SEARCH_BATCH_WINDOW, max_size: int = SEARCH_BATCH_MAX_SIZE):
+        self.client = client
+        self.collection_name = collection_name
+        self.window = window
+        self.max_size = max_size
+        self._pending = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name=f'qdrant-search-batcher-{collection_name}', daemon=True
+        )
+        self._thread.start()
+    
+    def search(self, request: SearchRequest):
+        """
+        Run request as part of the next batch.
+        
+        Returns:
+            The scored points of request, as client.search would
+        
+        Raises:
+            concurrent.futures.TimeoutError: If the batch did not complete
+                within SEARCH_BATCH_TIMEOUT seconds
+        """
+        future = Future()
+        self._pending.put((request, future))
+        return future.result(timeout=SEARCH_BATCH_TIMEOUT)
+    
+    def _run(self):
+        """Collect pending requests into batches and send them, forever."""
+        while True:
+            batch = [self._pending.get()]
+            try:
+                if not self._pending.empty():
+                    self._collect(batch)
+                self._send(batch)
+            except Exception as e:
+                # Keep the thread alive; callers of this batch get the error
+                print(f"Search batcher failed: {str(e)}")
+                self._fail(batch, e)
+    
+    def _collect(self, batch):
+        """Add requests arriving within the batch window to batch, up to max_size."""
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._pending.get(timeout=timeout))
+            except queue.Empty:
+                break
+    
+    def _send(self, batch):
+        """Send one batch and resolve its futures in request order."""
+        try:
+            results = self.client.search_batch(
+                collection_name=self.collection_name,
+                requests=[request for request, _ in batch]
+            )
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        for (_, future), points in zip(batch, results):
+            future.set_result(points)
+        if len(results) < len(batch):
+            self._fail(batch, RuntimeError(
+                f"Qdrant returned {len(results)} result lists for {len(batch)} searches"
+            ))
+    
+    @staticmethod
+    def _fail(batch, error):
+        """Fail the futures of batch that are still unresolved."""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+
+def _get_search_batcher(client: QdrantClient, collection_name: str) -> SearchBatcher:
+    """Return the shared SearchBatcher for collection_name, starting it on first use."""
+    batcher = _search_batchers.get(collection_name)
+    if batcher is not None:
+        return batcher
+    with _lock:
+        if collection_name not in _search_batchers:
+            _search_batchers[collection_name] = SearchBatcher(client, collection_name)
+        return _search_batchers[collection_name]
+
+
+def get_qdrant_service() -> 'QdrantService':
+    """Return the process-wide QdrantService."""
+    return QdrantService.from_singleton()
 
 
 class QdrantService:
     """Service for managing vector operations with Qdrant."""
     
     def __init__(self):
-        self.client = QdrantClient(
-            host=os.getenv('QDRANT_HOST', 'localhost'),
-            port=int(os.getenv('QDRANT_PORT', '6333')),
-        )
+        self.client = _get_qdrant_client()
         self.collection_name = os.getenv('QDRANT_COLLECTION', 'manpages')
         self.embedding_model_name = os.getenv('EMBEDDING_MODEL', 'jinaai/jina-embeddings-v2-small-en')
         
-        # Initialize local embedding model
-        self.embedding_model = AutoModel.from_pretrained(
-            self.embedding_model_name, 
-            trust_remote_code=True
+        # Initialize local embedding model. When EMBEDDING_ONNX_PATH points at a
+        # model exported with `manage.py export_embedding_onnx`, inference runs
+        # on ONNX Runtime instead of eager PyTorch.
+        self.onnx_model_path = os.getenv('EMBEDDING_ONNX_PATH')
+        if self.onnx_model_path:
+            self.embedding_model = None
+            self.onnx_session = _get_onnx_session(self.onnx_model_path)
+            self.tokenizer = _get_tokenizer(self.embedding_model_name)
+        else:
+            self.embedding_model = _get_embedding_model(self.embedding_model_name)
+            self.onnx_session = None
+            self.tokenizer = self.embedding_model.tokenizer
+        
+        # Backends (FP32/INT8 ONNX, FP32/BF16 PyTorch) give slightly different
+        # embeddings, so the backend is part of the embedding cache key
+        self.embedding_backend = self._embedding_backend_id()
+        
+        # In-memory LRU of recent query embeddings, in front of the disk cache
+        self._cached_query_embedding = functools.lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)(
+            lambda query: tuple(self.get_embedding(query))
         )
         
-        # Ensure collection exists
-        self._ensure_collection_exists()
+        # Ensure collection exists (once per collection per process)
+        with _lock:
+            if self.collection_name not in _checked_collections:
+                self._ensure_collection_exists()
+                _checked_collections.add(self.collection_name)
+    
+    @classmethod
+    def from_singleton(cls) -> 'QdrantService':
+        """Return the process-wide QdrantService, creating it on first use."""
+        global _shared_service
+        # Once created, the instance is returned without taking the lock
+        if _shared_service is not None:
+            return _shared_service
+        with _lock:
+            if _shared_service is None:
+                _shared_service = cls()
+            return _shared_service
     
     def _ensure_collection_exists(self):
         """Create collection if it doesn't exist or recreate if dimensions don't match."""
-        try:
-            collection_info = self.client.get_collection(self.collection_name)
-            existing_dimension = collection_info.config.params.vectors.size
-            expected_dimension = 512  # Jina embeddings v2 small dimension
+        # collection_exists works the same over REST and gRPC, unlike the
+        # transport-specific "not found" errors of get_collection
+        if not self.client.collection_exists(self.collection_name):
+            print(f"Creating new collection with {VECTOR_DIM} dimensions...")
+            self._create_collection()
+            print("✓ Collection created successfully")
+            return
+        
+        collection_info = self.client.get_collection(self.collection_name)
+        existing_dimension = collection_info.config.params.vectors.size
+        expected_dimension = VECTOR_DIM
+        
+        if existing_dimension != expected_dimension:
+            print(f"Collection exists with {existing_dimension} dimensions, but need {expected_dimension}")
+            print("Recreating collection with correct dimensions...")
             
-            if existing_dimension != expected_dimension:
-                print(f"Collection exists with {existing_dimension} dimensions, but need {expected_dimension}")
-                print("Recreating collection with correct dimensions...")
-                
-                # Delete existing collection
-                self.client.delete_collection(self.collection_name)
-                
-                # Create new collection with correct dimensions
-                self.client.create_collection(
+            # Delete existing collection
+            self.client.delete_collection(self.collection_name)
+            
+            # Create new collection with correct dimensions
+            self._create_collection()
+            print(f"✓ Collection recreated with {expected_dimension} dimensions")
+        else:
+            print(f"✓ Collection exists with correct dimensions ({existing_dimension})")
+            if collection_info.config.quantization_config is None:
+                # Collections created before quantization was enabled
+                self.client.update_collection(
                     collection_name=self.collection_name,
-                    vectors_config=VectorParams(
-                        size=expected_dimension,  # Jina embeddings v2 small dimension
-                        distance=Distance.COSINE
-                    )
+                    quantization_config=QUANTIZATION_CONFIG
                 )
-                print(f"✓ Collection recreated with {expected_dimension} dimensions")
-            else:
-                print(f"✓ Collection exists with correct dimensions ({existing_dimension})")
-                
-        except UnexpectedResponse:
-            # Collection doesn't exist, create it
-            print(f"Creating new collection with {512} dimensions...")
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=512,  # Jina embeddings v2 small dimension
-                    distance=Distance.COSINE
+                print("✓ Enabled int8 scalar quantization on existing collection")
+            if collection_info.config.params.vectors.datatype != Datatype.FLOAT16:
+                print("! Collection stores FP32 vectors; recreate it and re-run "
+                      "populate_search_vectors to switch to FP16 on-disk storage")
+            hnsw = collection_info.config.hnsw_config
+            if (hnsw.m, hnsw.ef_construct) != (HNSW_CONFIG.m, HNSW_CONFIG.ef_construct):
+                # Qdrant rebuilds the HNSW index in the background
+                self.client.update_collection(
+                    collection_name=self.collection_name,
+                    hnsw_config=HNSW_CONFIG,
+                    optimizers_config=OPTIMIZERS_CONFIG
                 )
-            )
-            print("✓ Collection created successfully")
+                print(f"✓ Updated HNSW config (m={HNSW_CONFIG.m}, ef_construct={HNSW_CONFIG.ef_construct})")
+    
+    def _create_collection(self):
+        """
+        Create the collection with the configured vector size, HNSW tuning and int8 quantization.
+        
+        Original vectors (used for rescoring) are kept on disk as FP16 and
+        payloads are read from disk, so only the int8 copy and the HNSW
+        graph have to stay in RAM.
+        """
+        self.client.create_collection(
+            collection_name=self.collection_name,
+            vectors_config=VectorParams(
+                size=VECTOR_DIM,
+                distance=Distance.COSINE,
+                on_disk=True,
+                datatype=Datatype.FLOAT16
+            ),
+            on_disk_payload=True,
+            hnsw_config=HNSW_CONFIG,
+            optimizers_config=OPTIMIZERS_CONFIG,
+            quantization_config=QUANTIZATION_CONFIG
+        )
+    
+    @staticmethod
+    def metadata_for_chunk(chunk) -> Dict[str, Any]:
+        """Build the Qdrant payload metadata for a chunk (expects chunk.document to be loaded)."""
+        document = chunk.document
+        return {
+            'document_name': document.name,
+            'document_section': document.section,
+            'document_title': document.title,
+            'section_name': chunk.section_name,
+            'anchor': chunk.anchor,
+            'token_count': chunk.token_count,
+            'version_tag': document.version_tag
+        }
     
     def get_embedding(self, text: str) -> List[float]:
         """Get embedding for text using Jina embeddings model."""
+        return self.get_embeddings([text])[0]
+    
+    def get_embeddings(self, texts: List[str], batch_size: int = 32, use_cache: bool = True) -> List[List[float]]:
+        """
+        Get embeddings for several texts.
+        
+        Embeddings are cached in the 'embeddings' cache keyed by model,
+        inference backend, vector size and text, so only texts that were
+        never embedded before go through the model.
+        
+        Args:
+            texts: Texts to embed
+            batch_size: Number of texts per model forward pass
+            use_cache: Read and write the embedding cache
+        
+        Returns:
+            One embedding per text, in the same order as texts
+        """
+        if not use_cache:
+            return self._compute_embeddings(texts, batch_size)
+        
+        cache = caches['embeddings']
+        keys = [self._embedding_cache_key(text) for text in texts]
+        cached = cache.get_many(keys)
+        
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            computed = self._compute_embeddings([texts[i] for i in missing], batch_size)
+            new_entries = {
+                keys[i]: np.asarray(embedding, dtype=np.float32).tobytes()
+                for i, embedding in zip(missing, computed)
+            }
+            cache.set_many(new_entries)
+            cached.update(new_entries)
+        
+        return [np.frombuffer(cached[key], dtype=np.float32).tolist() for key in keys]
+    
+    def _embedding_backend_id(self) -> str:
+        """
+        Identify the inference backend producing embeddings.
+        
+        ONNX models are identified by path, size and modification time so a
+        re-exported or quantized model gets fresh cache entries; PyTorch
+        models by their weight dtype.
+        """
+        if self.onnx_session is not None:
+            stat = os.stat(self.onnx_model_path)
+            return f"onnx:{os.path.abspath(self.onnx_model_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        return f"torch:{next(self.embedding_model.parameters()).dtype}"
+    
+    def _embedding_cache_key(self, text: str) -> str:
+        """Build the embedding cache key for text."""
+        digest = hashlib.sha256(
+            f"{self.embedding_model_name}:{self.embedding_backend}:{VECTOR_DIM}:{text}".encode('utf-8')
+        ).hexdigest()
+        return f"embedding:{digest}"
+    
+    def _compute_embeddings(self, texts: List[str], batch_size: int) -> List[List[float]]:
+        """Run the embedding model, one forward pass per batch_size texts."""
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        # Batch texts of similar length together so little of each batch is padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
         try:
-            # Tokenize and encode the input text
-            inputs = self.embedding_model.tokenizer(text, return_tensors='pt', padding=True, truncation=True, max_length=8192)
-            
-            with torch.no_grad():
-                # Generate embeddings
-                outputs = self.embedding_model(**inputs)
-                # Extract the embeddings from the model output
-                embeddings = outputs.last_hidden_state.mean(dim=1)
-            
-            return embeddings.squeeze().tolist()
+            for start in range(0, len(order), batch_size):
+                indices = order[start:start + batch_size]
+                batch = [texts[i] for i in indices]
+                if self.onnx_session is not None:
+                    batch_embeddings = self._embed_onnx(batch)
+                else:
+                    batch_embeddings = self._embed_torch(batch)
+                for i, embedding in zip(indices, batch_embeddings):
+                    embeddings[i] = embedding
         except Exception as e:
             raise Exception(f"Failed to get embedding: {e}")
+        
+        return embeddings
+    
+    def _tokenize(self, texts: List[str], return_tensors: str):
+        """Tokenize a batch, padding to a multiple of PAD_TO_MULTIPLE_OF tokens so tensor shapes repeat."""
+        return self.tokenizer(
+            texts,
+            return_tensors=return_tensors,
+            padding=True,
+            pad_to_multiple_of=PAD_TO_MULTIPLE_OF,
+            truncation=True,
+            max_length=8192
+        )
+    
+    def _embed_torch(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts with the PyTorch model."""
+        inputs = self._tokenize(texts, 'pt')
+        
+        with torch.inference_mode():
+            outputs = self.embedding_model(**inputs)
+            # Mean-pool over real tokens only so padding doesn't bias shorter texts
+            hidden = outputs.last_hidden_state.float()
+            mask = inputs['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        
+        return self._truncate(pooled.numpy())
+    
+    def _embed_onnx(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts with the ONNX Runtime session."""
+        inputs = self._tokenize(texts, 'np')
+        input_ids = inputs['input_ids'].astype(np.int64)
+        attention_mask = inputs['attention_mask'].astype(np.int64)
+        
+        hidden = self.onnx_session.run(None, {'input_ids': input_ids, 'attention_mask': attention_mask})[0]
+        mask = attention_mask[..., np.newaxis].astype(hidden.dtype)
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return self._truncate(pooled)
+    
+    @staticmethod
+    def _truncate(pooled: np.ndarray) -> List[List[float]]:
+        """Truncate pooled embeddings to VECTOR_DIM and L2-normalise them when shortened."""
+        if VECTOR_DIM < pooled.shape[-1]:
+            pooled = pooled[:, :VECTOR_DIM]
+            pooled = pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.tolist()
+    
+    def add_chunks(self, items: List[tuple], encode_batch_size: int = DEFAULT_ENCODE_BATCH_SIZE,
+                   upsert_batch_size: int = DEFAULT_UPSERT_BATCH_SIZE) -> List[uuid.UUID]:
+        """
+        Add several chunks to Qdrant.
+        
+        Args:
+            items: List of (chunk_id, text, metadata) tuples
+            encode_batch_size: Number of texts embedded per forward pass
+            upsert_batch_size: Number of points sent per upsert request
+        
+        Returns:
+            List of generated point IDs, in the same order as items
+        """
+        point_ids = []
+        pending = []
+        
+        for start in range(0, len(items), encode_batch_size):
+            batch = items[start:start + encode_batch_size]
+            # Chunk texts are embedded once per indexing run, so skip the cache
+            embeddings = self.get_embeddings([text for _, text, _ in batch], batch_size=encode_batch_size,
+                                             use_cache=False)
+            
+            for (chunk_id, text, metadata), embedding in zip(batch, embeddings):
+                point_id = uuid.uuid4()
+                pending.append(PointStruct(
+                    id=str(point_id),
+                    vector=embedding,
+                    payload={
+                        'chunk_id': chunk_id,
+                        'text': text,
+                        **metadata
+                    }
+                ))
+                point_ids.append(point_id)
+            
+            # Full batches are sent without waiting for Qdrant to apply them;
+            # at least one point is kept back for the final, waited upsert
+            while len(pending) > upsert_batch_size:
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=pending[:upsert_batch_size],
+                    wait=False
+                )
+                pending = pending[upsert_batch_size:]
+        
+        # Updates are applied in order, so once the last batch is applied
+        # every point of this call is searchable
+        if pending:
+            self.client.upsert(
+                collection_name=self.collection_name,
+                points=pending,
+                wait=True
+            )
+        
+        return point_ids
     
-    def add_chunk(self, chunk_id: str, text: str, metadata: Dict[str, Any]) -> str:
+    def add_chunk(self, chunk_id: str, text: str, metadata: Dict[str, Any]) -> uuid.UUID:
         """Add a chunk to Qdrant."""
         embedding = self.get_embedding(text)
         
         # Generate a unique point ID
-        point_id = str(uuid.uuid4())
+        point_id = uuid.uuid4()
         
         point = PointStruct(
-            id=point_id,
+            id=str(point_id),
             vector=embedding,
             payload={
                 'chunk_id': chunk_id,
@@ -107,21 +639,97 @@ class QdrantService:
         
         return point_id
     
-    def search_similar(self, query: str, limit: int = 20, score_threshold: float = 0.7) -> List[Dict[str, Any]]:
-        """Search for similar chunks using vector similarity."""
-        query_embedding = self.get_embedding(query)
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Get the embedding for a search query.
+        
+        Queries are normalised by collapsing whitespace, and the embeddings
+        of the most recent QUERY_EMBEDDING_CACHE_SIZE queries are kept in
+        memory so repeated searches skip the encoder.
+        """
+        return list(self._cached_query_embedding(' '.join(query.split())))
+    
+    def search_similar(self, query: str, limit: int = 20, score_threshold: float = 0.7,
+                       query_vector: Optional[List[float]] = None, hnsw_ef: Optional[int] = None,
+                       oversampling: Optional[float] = None, rescore: bool = True,
+                       coalesce: bool = False) -> List[Dict[str, Any]]:
+        """
+        Search for similar chunks using vector similarity, reusing query_vector when already computed.
+        
+        hnsw_ef, oversampling and rescore override the default search
+        parameters for this request (see search_params). With coalesce, the
+        search is sent together with other concurrent searches of this
+        process in one Qdrant batch request (see SearchBatcher).
+        """
+        if query_vector is None:
+            query_vector = self.embed_query(query)
+        params = search_params(hnsw_ef, oversampling, rescore)
+        if coalesce and SEARCH_BATCH_WINDOW > 0:
+            batcher = _get_search_batcher(self.client, self.collection_name)
+            return self._format_results(
+                batcher.search(self._search_request(query_vector, limit, score_threshold, params))
+            )
+        return self._search_vector(query_vector, limit, score_threshold, params)
+    
+    def search_similar_batch(self, queries: List[str], limit: int = 20, score_threshold: float = 0.7,
+                             hnsw_ef: Optional[int] = None, oversampling: Optional[float] = None,
+                             rescore: bool = True) -> List[List[Dict[str, Any]]]:
+        """
+        Search for several queries at once.
+        
+        All queries are embedded in batched forward passes, then sent to
+        Qdrant in batch search requests of SEARCH_BATCH_REQUEST_SIZE queries.
         
+        Returns:
+            One result list per query, in the same order as queries
+        """
+        query_embeddings = self.get_embeddings(queries)
+        params = search_params(hnsw_ef, oversampling, rescore)
+        results = []
+        for start in range(0, len(query_embeddings), SEARCH_BATCH_REQUEST_SIZE):
+            batch_results = self.client.search_batch(
+                collection_name=self.collection_name,
+                requests=[
+                    self._search_request(vector, limit, score_threshold, params)
+                    for vector in query_embeddings[start:start + SEARCH_BATCH_REQUEST_SIZE]
+                ]
+            )
+            results.extend(self._format_results(search_results) for search_results in batch_results)
+        return results
+    
+    @staticmethod
+    def _search_request(query_embedding: List[float], limit: int, score_threshold: float,
+                        params: SearchParams) -> SearchRequest:
+        """Build a batch search request equivalent to _search_vector."""
+        return SearchRequest(
+            vector=query_embedding,
+            limit=limit,
+            score_threshold=score_threshold,
+            params=params,
+            with_payload=True
+        )
+    
+    def _search_vector(self, query_embedding: List[float], limit: int, score_threshold: float,
+                       params: SearchParams = SEARCH_PARAMS) -> List[Dict[str, Any]]:
+        """Search the collection with an already computed query embedding."""
         search_results = self.client.search(
             collection_name=self.collection_name,
             query_vector=query_embedding,
             limit=limit,
-            score_threshold=score_threshold
+            score_threshold=score_threshold,
+            search_params=params
         )
         
+        return self._format_results(search_results)
+    
+    @staticmethod
+    def _format_results(search_results) -> List[Dict[str, Any]]:
+        """Convert scored Qdrant points into result dictionaries."""
         results = []
         for result in search_results:
             results.append({
                 'chunk_id': result.payload['chunk_id'],
+                'point_id': str(result.id),
                 'text': result.payload['text'],
                 'score': result.score,
                 'metadata': {k: v for k, v in result.payload.items() if k not in ['chunk_id', 'text']}
@@ -131,61 +739,40 @@ class QdrantService:
     
     def search_with_filters(self, query: str, filters: Dict[str, Any], limit: int = 20) -> List[Dict[str, Any]]:
         """Search with additional filters."""
-        query_embedding = self.get_embedding(query)
+        query_embedding = self.embed_query(query)
         
-        # Build filter conditions
-        filter_conditions = []
-        for key, value in filters.items():
-            filter_conditions.append(
-                FieldCondition(key=key, match=MatchValue(value=value))
-            )
-        
-        search_filter = Filter(must=filter_conditions) if filter_conditions else None
+        search_filter = build_filter(filters)
         
         search_results = self.client.search(
             collection_name=self.collection_name,
             query_vector=query_embedding,
             query_filter=search_filter,
-            limit=limit
+            limit=limit,
+            search_params=SEARCH_PARAMS
         )
         
-        results = []
-        for result in search_results:
-            results.append({
-                'chunk_id': result.payload['chunk_id'],
-                'text': result.payload['text'],
-                'score': result.score,
-                'metadata': {k: v for k, v in result.payload.items() if k not in ['chunk_id', 'text']}
-            })
-        
-        return results
+        return self._format_results(search_results)
     
-    def delete_chunk(self, qdrant_id: str):
+    def delete_chunk(self, qdrant_id):
         """Delete a chunk from Qdrant."""
         self.client.delete(
             collection_name=self.collection_name,
-            points_selector=[qdrant_id]
+            points_selector=[str(qdrant_id)]
         )
     
     def recreate_collection(self):
         """Manually recreate the collection with correct dimensions."""
         try:
             # Delete existing collection if it exists
-            try:
+            if self.client.collection_exists(self.collection_name):
                 self.client.delete_collection(self.collection_name)
                 print(f"✓ Deleted existing collection '{self.collection_name}'")
-            except UnexpectedResponse:
+            else:
                 print(f"Collection '{self.collection_name}' doesn't exist")
             
             # Create new collection
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=512,  # Jina embeddings v2 small dimension
-                    distance=Distance.COSINE
-                )
-            )
-            print(f"✓ Created new collection '{self.collection_name}' with 512 dimensions")
+            self._create_collection()
+            print(f"✓ Created new collection '{self.collection_name}' with {VECTOR_DIM} dimensions")
             return True
             
         except Exception as e:
@@ -200,6 +787,7 @@ class QdrantService:
                 'name': self.collection_name,
                 'embedding_model': self.embedding_model_name,
                 'vector_size': collection_info.config.params.vectors.size,
+                'expected_vector_size': VECTOR_DIM,
                 'vectors_count': collection_info.vectors_count,
                 'status': collection_info.status
             }
@@ -1,25 +1,243 @@
+import functools
+import hashlib
+import logging
 import random
-from typing import List, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterator, Optional
 
 import dspy
+import httpx
+import numpy as np
+import tiktoken
 from django.conf import settings
+from django.core.cache import cache
 from openai import OpenAI
 
-from .search import ManPageSearch
+from .search import get_searcher
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # HTTP/2 needs the httpx[http2] extra; HTTP/1.1 keep-alive is used otherwise
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# LLM calls are I/O bound, so batched questions are answered on this many
+# threads at once to overlap their HTTP latency
+DEFAULT_LLM_THREADS = 8
+
+# Prompt token budget for the man-page context of one question, and the
+# most any single chunk may take of it
+CONTEXT_TOKEN_BUDGET = 2000
+MAX_CHUNK_TOKENS = 800
+
+# Questions outside these lengths (in characters) are answered without
+# retrieval or an LLM call
+MIN_QUESTION_LENGTH = 3
+MAX_QUESTION_LENGTH = 512
+
+# Start of the answer returned when the LLM call fails; such answers are
+# not worth caching
+ANSWER_ERROR_PREFIX = "I apologize, but I encountered an error while generating an answer"
+
+# Answers to the SEMANTIC_CACHE_SIZE most recent questions are reused for
+# new questions whose embedding is at least SEMANTIC_CACHE_THRESHOLD
+# cosine-similar, for up to SEMANTIC_CACHE_TIMEOUT seconds
+SEMANTIC_CACHE_SIZE = 256
+SEMANTIC_CACHE_THRESHOLD = 0.95
+SEMANTIC_CACHE_TIMEOUT = 600
+
+# Seconds that the chunks retrieved for a question are reused
+RETRIEVAL_CACHE_TIMEOUT = 60
+
+# Connection pool of the shared OpenAI client, sized well above
+# DEFAULT_LLM_THREADS so concurrent requests reuse warm TLS connections
+OPENAI_MAX_CONNECTIONS = 64
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = 32
+OPENAI_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+OPENAI_KEEPALIVE_EXPIRY = 60.0
+
+# Seconds between connection warmups issued while a streamed question is
+# being retrieved; kept below OPENAI_KEEPALIVE_EXPIRY so the pool stays warm
+LLM_WARMUP_INTERVAL = 30.0
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding(model_name):
+    """Return the tiktoken encoding for model_name, falling back to cl100k_base for unknown models."""
+    try:
+        return tiktoken.encoding_for_model(model_name or '')
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@functools.lru_cache(maxsize=None)
+def loading_messages():
+    """Return the loading messages from settings as a tuple, read once per process."""
+    return tuple(settings.FUNNY_LOADING_SENTENCES)
+
+
+def random_loading_message() -> str:
+    """Get a random funny loading message without creating the RAG service."""
+    return random.choice(loading_messages())
+
+
+_lock = threading.Lock()
+_shared_service = None
+
+
+def get_service() -> 'ManPageRAGService':
+    """
+    Return the process-wide ManPageRAGService, creating it on first use.
+    
+    Sharing one instance keeps the OpenAI client's connection pool and the
+    DSPy configuration alive across requests.
+    """
+    global _shared_service
+    # Once created, the instance is returned without taking the lock
+    if _shared_service is not None:
+        return _shared_service
+    with _lock:
+        if _shared_service is None:
+            _shared_service = ManPageRAGService()
+        return _shared_service
+
+
+@dataclass(slots=True)
+class RetrievedChunk:
+    """A chunk retrieved as LLM context, also returned in API responses."""
+    id: str
+    document_name: str
+    document_section: str
+    document_title: str
+    section_name: str
+    anchor: str
+    text: str
+    similarity: Optional[float]
+
+
+class SemanticAnswerCache:
+    """Ring buffer of recent question embeddings and their answers, matched by cosine similarity."""
+    
+    def __init__(self, size: int = SEMANTIC_CACHE_SIZE, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 timeout: float = SEMANTIC_CACHE_TIMEOUT):
+        self.size = size
+        self.threshold = threshold
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.clear()
+    
+    def clear(self):
+        """Forget all cached answers."""
+        with self._lock:
+            self._vectors = None
+            self._added = np.full(self.size, -np.inf)
+            self._answers = [None] * self.size
+            self._next = 0
+    
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+    
+    def get(self, vector) -> Optional[Dict[str, Any]]:
+        """Return the answer of the most similar recent question, if it is similar enough."""
+        vector = self._unit(vector)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                return None
+            # One matrix-vector product scores every cached question
+            scores = self._vectors @ vector
+            scores[self._added < time.monotonic() - self.timeout] = -np.inf
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            return self._answers[best]
+    
+    def add(self, vector, answer: Dict[str, Any]):
+        """Cache answer for the question embedded as vector, replacing the oldest entry."""
+        vector = self._unit(vector)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._vectors = np.zeros((self.size, vector.shape[0]), dtype=np.float32)
+                self._added[:] = -np.inf
+            self._vectors[self._next] = vector
+            self._added[self._next] = time.monotonic()
+            self._answers[self._next] = answer
+            self._next = (self._next + 1) % self.size
+
+
+class ManPageQA(dspy.Signature):
+    """Answer questions about Linux man pages based on provided context."""
+    context = dspy.InputField(desc="Relevant man page documentation")
+    question = dspy.InputField(desc="User's question about Linux commands or system functions")
+    answer = dspy.OutputField(desc="Comprehensive answer based on the context")
 
 
 class ManPageRAGService:
     """RAG service for answering questions using man-page documentation."""
     
     def __init__(self):
-        self.searcher = ManPageSearch()
+        self.searcher = get_searcher()
         
         # Check if OpenAI API key is configured
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is not configured in settings. Please set it in your environment variables.")
         
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = OpenAI(api_key=settings.OPENAI_API_KEY, http_client=self._build_http_client())
         self._setup_dspy()
+        
+        self.semantic_cache = SemanticAnswerCache()
+        self._warmup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='llm-warmup')
+        self._warmup_lock = threading.Lock()
+        self._last_warmup = 0.0
+        self._encoding_loaded = False
+    
+    @staticmethod
+    def _build_http_client():
+        """Build the pooled keep-alive HTTP client shared by all OpenAI calls of this service."""
+        return httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+            ),
+            timeout=OPENAI_TIMEOUT
+        )
+    
+    def _start_llm_warmup(self, connect: bool = False):
+        """
+        Prepare the answer step in the background while retrieval runs.
+        
+        Loads the tiktoken encoding used by _prepare_context once. With
+        connect, also opens (or refreshes) a pooled connection of self.client
+        with a token-free model lookup, at most once per LLM_WARMUP_INTERVAL
+        seconds; only the streaming path answers through self.client, as DSPy
+        sends its calls through its own LiteLLM client.
+        """
+        with self._warmup_lock:
+            now = time.monotonic()
+            connect = connect and now - self._last_warmup >= LLM_WARMUP_INTERVAL
+            if connect:
+                self._last_warmup = now
+            elif self._encoding_loaded:
+                return
+            self._encoding_loaded = True
+        self._warmup_executor.submit(self._warm_llm, connect)
+    
+    def _warm_llm(self, connect: bool):
+        """Load the prompt encoding and, with connect, touch the OpenAI API; failures only cost the warmup."""
+        try:
+            _get_encoding(settings.OPENAI_MODEL)
+            if connect:
+                self.client.with_options(max_retries=0, timeout=5.0).models.retrieve(settings.OPENAI_MODEL)
+        except Exception as e:
+            logger.warning("LLM warmup failed: %s", e)
     
     def _setup_dspy(self):
         """Setup DSPy with OpenAI model."""
@@ -40,8 +258,11 @@ class ManPageRAGService:
             except AttributeError:
                 # If DSPy is not properly installed or configured, we'll use fallback
                 print("Warning: DSPy not properly configured, using fallback OpenAI API")
+        
+        # Build the Q&A module once and reuse it for every question
+        self._qa_module = dspy.ChainOfThought(ManPageQA)
     
-    def search_relevant_chunks(self, question: str, limit: int = 5) -> List[Dict[str, Any]]:
+    def search_relevant_chunks(self, question: str, limit: int = 5) -> List[RetrievedChunk]:
         """
         Search for relevant chunks based on the question.
         
@@ -50,37 +271,73 @@ class ManPageRAGService:
             limit (int): Maximum number of chunks to retrieve
         
         Returns:
-            List[Dict]: Relevant chunks with metadata
+            List[RetrievedChunk]: Relevant chunks with metadata
+        """
+        cache_key = f"rag_chunks:{limit}:{hashlib.sha256(question.encode('utf-8')).hexdigest()}"
+        
+        # Retrieval is shared between users; only the generated answer is not cached
+        chunks = cache.get(cache_key)
+        if chunks is not None:
+            return chunks
+        
+        try:
+            chunks = self._serialize_chunks(self.searcher.search_chunks(
+                query=question,
+                search_type='vector',
+                limit=limit,
+                score_threshold=0.6,
+                fallback=False
+            ))
+        except Exception:
+            # Full-text fallback context is used for this answer but not cached
+            return self._serialize_chunks(self.searcher.text_search(question, limit))
+        
+        cache.set(cache_key, chunks, RETRIEVAL_CACHE_TIMEOUT)
+        return chunks
+    
+    def search_relevant_chunks_batch(self, questions: List[str], limit: int = 5) -> List[List[RetrievedChunk]]:
+        """
+        Search for relevant chunks for several questions at once.
+        
+        Args:
+            questions (List[str]): The users' questions
+            limit (int): Maximum number of chunks to retrieve per question
+        
+        Returns:
+            List[List[RetrievedChunk]]: Relevant chunks with metadata, one list per question
         """
-        chunks = self.searcher.search_chunks(
-            query=question,
+        chunk_lists = self.searcher.search_chunks_batch(
+            queries=questions,
             search_type='vector',
             limit=limit,
             score_threshold=0.6
         )
         
-        results = []
-        for chunk in chunks:
-            results.append({
-                'id': str(chunk.id),
-                'document_name': chunk.document.name,
-                'document_section': chunk.document.section,
-                'document_title': chunk.document.title,
-                'section_name': chunk.section_name,
-                'anchor': chunk.anchor,
-                'text': chunk.text,
-                'similarity': getattr(chunk, 'similarity', None),
-            })
-        
-        return results
+        return [self._serialize_chunks(chunks) for chunks in chunk_lists]
     
-    def generate_answer(self, question: str, context_chunks: List[Dict[str, Any]]) -> str:
+    def _serialize_chunks(self, chunks) -> List[RetrievedChunk]:
+        """Convert chunks into the RetrievedChunks used as LLM context and API output."""
+        return [
+            RetrievedChunk(
+                id=str(chunk.id),
+                document_name=chunk.document.name,
+                document_section=chunk.document.section,
+                document_title=chunk.document.title,
+                section_name=chunk.section_name,
+                anchor=chunk.anchor,
+                text=chunk.text,
+                similarity=getattr(chunk, 'similarity', None),
+            )
+            for chunk in chunks
+        ]
+    
+    def generate_answer(self, question: str, context_chunks: List[RetrievedChunk]) -> str:
         """
         Generate an answer using DSPy based on the question and context.
         
         Args:
             question (str): The user's question
-            context_chunks (List[Dict]): Relevant chunks from search
+            context_chunks (List[RetrievedChunk]): Relevant chunks from search
         
         Returns:
             str: Generated answer
@@ -90,39 +347,97 @@ class ManPageRAGService:
         
         # Try DSPy first
         try:
-            # Create DSPy signature for Q&A
-            class ManPageQA(dspy.Signature):
-                """Answer questions about Linux man pages based on provided context."""
-                context = dspy.InputField(desc="Relevant man page documentation")
-                question = dspy.InputField(desc="User's question about Linux commands or system functions")
-                answer = dspy.OutputField(desc="Comprehensive answer based on the context")
-            
-            # Create the module
-            qa_module = dspy.ChainOfThought(ManPageQA)
-            
-            # Generate answer
-            result = qa_module(context=context_text, question=question)
+            result = self._qa_module(context=context_text, question=question)
             return result.answer
         except Exception as e:
             # Fallback to simple prompt if DSPy fails
             print(f"DSPy failed, using fallback: {str(e)}")
             return self._fallback_answer(question, context_text)
     
-    def _prepare_context(self, chunks: List[Dict[str, Any]]) -> str:
-        """Prepare context text from chunks."""
+    def generate_answers_batch(self, questions: List[str], context_chunk_lists: List[List[RetrievedChunk]],
+                               num_threads: int = DEFAULT_LLM_THREADS) -> List[str]:
+        """
+        Generate answers for several questions with one batched DSPy call.
+        
+        Args:
+            questions (List[str]): The users' questions
+            context_chunk_lists (List[List[RetrievedChunk]]): Relevant chunks for each question
+            num_threads (int): Number of LLM calls in flight at once
+        
+        Returns:
+            List[str]: Generated answers, in the same order as questions
+        """
+        contexts = [self._prepare_context(chunks) for chunks in context_chunk_lists]
+        
+        try:
+            examples = [
+                dspy.Example(context=context, question=question).with_inputs('context', 'question')
+                for question, context in zip(questions, contexts)
+            ]
+            results = self._qa_module.batch(examples, num_threads=num_threads)
+        except Exception as e:
+            print(f"DSPy batch failed, using fallback: {str(e)}")
+            results = [None] * len(questions)
+        
+        answers = [result.answer if result is not None else None for result in results]
+        
+        # Questions that failed inside the batch fall back individually, concurrently
+        failed = [i for i, answer in enumerate(answers) if answer is None]
+        if failed:
+            with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                fallback_answers = executor.map(
+                    lambda i: self._fallback_answer(questions[i], contexts[i]),
+                    failed
+                )
+                for i, answer in zip(failed, fallback_answers):
+                    answers[i] = answer
+        
+        return answers
+    
+    def _prepare_context(self, chunks: List[RetrievedChunk], budget: int = CONTEXT_TOKEN_BUDGET,
+                         max_chunk_tokens: int = MAX_CHUNK_TOKENS) -> str:
+        """
+        Prepare context text from chunks within a prompt token budget.
+        
+        Chunks are added most similar first; each chunk's text is cut to
+        max_chunk_tokens, and the last chunk that fits is cut at the token
+        boundary where the budget runs out.
+        """
+        encoding = _get_encoding(settings.OPENAI_MODEL)
+        ordered = sorted(
+            chunks,
+            key=lambda chunk: chunk.similarity if chunk.similarity is not None else float('-inf'),
+            reverse=True
+        )
+        
         context_parts = []
+        remaining = budget
         
-        for i, chunk in enumerate(chunks, 1):
-            doc_info = f"Document: {chunk['document_name']}({chunk['document_section']}) - {chunk['document_title']}"
-            section_info = f"Section: {chunk['section_name']}"
-            text_content = chunk['text']
+        for i, chunk in enumerate(ordered, 1):
+            doc_info = f"Document: {chunk.document_name}({chunk.document_section}) - {chunk.document_title}"
+            section_info = f"Section: {chunk.section_name}"
+            header = f"[{i}] {doc_info}\n{section_info}\n"
+            
+            remaining -= len(encoding.encode(header, disallowed_special=()))
+            if remaining <= 0:
+                break
+            
+            text_tokens = encoding.encode(chunk.text, disallowed_special=())
+            allowed = min(max_chunk_tokens, remaining)
+            if len(text_tokens) > allowed:
+                text_content = encoding.decode(text_tokens[:allowed])
+            else:
+                text_content = chunk.text
             
-            context_parts.append(f"[{i}] {doc_info}\n{section_info}\n{text_content}\n")
+            context_parts.append(f"{header}{text_content}\n")
+            remaining -= min(len(text_tokens), allowed)
+            if remaining <= 0:
+                break
         
         return "\n".join(context_parts)
     
-    def _fallback_answer(self, question: str, context: str) -> str:
-        """Fallback answer generation using direct OpenAI API."""
+    def _fallback_messages(self, question: str, context: str) -> List[Dict[str, str]]:
+        """Build the chat messages for direct OpenAI answer generation."""
         prompt = f"""You are a helpful assistant that answers questions about Linux man pages. 
 Use the provided context from man page documentation to answer the user's question accurately and comprehensively.
 
@@ -133,19 +448,81 @@ Question: {question}
 
 Please provide a detailed answer based on the context above. If the context doesn't contain enough information to answer the question, say so clearly."""
 
+        return [
+            {"role": "system", "content": "You are a Linux documentation expert."},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _fallback_answer(self, question: str, context: str) -> str:
+        """Fallback answer generation using direct OpenAI API."""
         try:
             response = self.client.chat.completions.create(
                 model=settings.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are a Linux documentation expert."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._fallback_messages(question, context),
                 max_tokens=1000,
                 temperature=0.1
             )
             return response.choices[0].message.content
         except Exception as e:
-            return f"I apologize, but I encountered an error while generating an answer: {str(e)}"
+            return f"{ANSWER_ERROR_PREFIX}: {str(e)}"
+    
+    def _stream_answer_tokens(self, question: str, context: str) -> Iterator[str]:
+        """Yield answer text fragments from a streaming OpenAI completion as they arrive."""
+        stream = self.client.chat.completions.create(
+            model=settings.OPENAI_MODEL,
+            messages=self._fallback_messages(question, context),
+            max_tokens=1000,
+            temperature=0.1,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def stream_answer(self, question: str) -> Iterator[Dict[str, Any]]:
+        """
+        Answer a question, yielding events as soon as each part is ready.
+        
+        Yields a 'sources' event with the retrieved context, one 'token'
+        event per answer fragment, then a 'done' event. If the LLM call
+        fails, an 'error' event ends the stream instead of 'done'.
+        
+        The answer comes from a plain streaming completion (the prompt of
+        _fallback_messages), not the DSPy module used by ask_question, so
+        its wording can differ from the JSON answer to the same question.
+        
+        Args:
+            question (str): The user's question
+        
+        Returns:
+            Iterator[Dict]: Events with 'event' and 'data' keys
+        """
+        rejection = self._reject_question(question)
+        if rejection is not None:
+            yield from self._response_events(self._rejected_response(question, rejection))
+            return
+        
+        self._start_llm_warmup(connect=True)
+        relevant_chunks = self.search_relevant_chunks(question)
+        
+        if not relevant_chunks:
+            yield from self._response_events(self._no_context_response(question))
+            return
+        
+        response = self._build_response(question, '', relevant_chunks)
+        yield {'event': 'sources', 'data': {k: v for k, v in response.items() if k != 'answer'}}
+        
+        context_text = self._prepare_context(relevant_chunks)
+        try:
+            for token in self._stream_answer_tokens(question, context_text):
+                yield {'event': 'token', 'data': token}
+        except Exception as e:
+            # The exception text stays in the log, not in the client's answer
+            logger.warning("Streaming answer failed: %s", e)
+            yield {'event': 'error', 'data': {'error': f"{ANSWER_ERROR_PREFIX}."}}
+            return
+        
+        yield {'event': 'done', 'data': None}
     
     def ask_question(self, question: str) -> Dict[str, Any]:
         """
@@ -157,28 +534,137 @@ Please provide a detailed answer based on the context above. If the context does
         Returns:
             Dict: Answer with metadata
         """
-        # Search for relevant chunks
+        # Reject questions that cannot match anything before searching
+        rejection = self._reject_question(question)
+        if rejection is not None:
+            return self._rejected_response(question, rejection)
+        
+        # Load the prompt encoding while searching for relevant chunks
+        self._start_llm_warmup()
         relevant_chunks = self.search_relevant_chunks(question)
         
         if not relevant_chunks:
-            return {
-                'answer': "I couldn't find any relevant information in the man pages to answer your question.",
-                'context_chunks': [],
-                'sources': [],
-                'question': question
-            }
+            return self._no_context_response(question)
         
         # Generate answer using DSPy
         answer = self.generate_answer(question, relevant_chunks)
         
+        return self._build_response(question, answer, relevant_chunks)
+    
+    def ask_question_cached(self, question: str) -> Dict[str, Any]:
+        """
+        Answer a question, reusing the answer to a recent near-identical question.
+        
+        The question is embedded once; the embedding is kept by the Qdrant
+        service, so a cache miss retrieves without embedding again.
+        
+        Args:
+            question (str): The user's question
+        
+        Returns:
+            Dict: Answer with metadata
+        """
+        if self._reject_question(question) is not None:
+            return self.ask_question(question)
+        
+        try:
+            vector = self.searcher.qdrant_service.embed_query(question)
+        except Exception as e:
+            print(f"Could not embed question for the semantic cache: {str(e)}")
+            return self.ask_question(question)
+        
+        cached = self.semantic_cache.get(vector)
+        if cached is not None:
+            return {**cached, 'question': question}
+        
+        result = self.ask_question(question)
+        if not result['answer'].startswith(ANSWER_ERROR_PREFIX):
+            self.semantic_cache.add(vector, result)
+        return result
+    
+    def ask_questions_batch(self, questions: List[str], num_threads: int = DEFAULT_LLM_THREADS) -> List[Dict[str, Any]]:
+        """
+        Answer several questions with one batched retrieval and one batched LLM call.
+        
+        Args:
+            questions (List[str]): The users' questions
+            num_threads (int): Number of LLM calls in flight at once
+        
+        Returns:
+            List[Dict]: Answer with metadata for each question, in order
+        """
+        rejections = [self._reject_question(question) for question in questions]
+        searchable = [i for i, rejection in enumerate(rejections) if rejection is None]
+        chunk_lists = dict(zip(
+            searchable,
+            self.search_relevant_chunks_batch([questions[i] for i in searchable]) if searchable else []
+        ))
+        
+        # Only questions with context go to the LLM
+        answerable = [i for i in searchable if chunk_lists[i]]
+        answers = self.generate_answers_batch(
+            [questions[i] for i in answerable],
+            [chunk_lists[i] for i in answerable],
+            num_threads=num_threads
+        ) if answerable else []
+        answer_by_index = dict(zip(answerable, answers))
+        
+        responses = []
+        for i, question in enumerate(questions):
+            if rejections[i] is not None:
+                responses.append(self._rejected_response(question, rejections[i]))
+            elif i in answer_by_index:
+                responses.append(self._build_response(question, answer_by_index[i], chunk_lists[i]))
+            else:
+                responses.append(self._no_context_response(question))
+        
+        return responses
+    
+    @staticmethod
+    def _reject_question(question: str) -> Optional[str]:
+        """Return why question cannot be answered without searching, or None if it should be searched."""
+        stripped = question.strip()
+        if len(stripped) < MIN_QUESTION_LENGTH or not any(c.isalpha() for c in stripped):
+            return "Please ask a more specific question."
+        if len(stripped) > MAX_QUESTION_LENGTH:
+            return f"Please keep your question under {MAX_QUESTION_LENGTH} characters."
+        return None
+    
+    def _rejected_response(self, question: str, message: str) -> Dict[str, Any]:
+        """Response for a question rejected by _reject_question."""
+        return {
+            'answer': message,
+            'context_chunks': [],
+            'sources': [],
+            'question': question
+        }
+    
+    @staticmethod
+    def _response_events(response: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Stream a complete response as the events produced by stream_answer."""
+        yield {'event': 'sources', 'data': {k: v for k, v in response.items() if k != 'answer'}}
+        yield {'event': 'token', 'data': response['answer']}
+        yield {'event': 'done', 'data': None}
+    
+    def _no_context_response(self, question: str) -> Dict[str, Any]:
+        """Response for a question with no relevant man-page chunks."""
+        return {
+            'answer': "I couldn't find any relevant information in the man pages to answer your question.",
+            'context_chunks': [],
+            'sources': [],
+            'question': question
+        }
+    
+    def _build_response(self, question: str, answer: str, relevant_chunks: List[RetrievedChunk]) -> Dict[str, Any]:
+        """Assemble the answer, its context chunks and their sources."""
         # Prepare sources
         sources = []
         for chunk in relevant_chunks:
             sources.append({
-                'document': f"{chunk['document_name']}({chunk['document_section']})",
-                'title': chunk['document_title'],
-                'section': chunk['section_name'],
-                'similarity': chunk['similarity']
+                'document': f"{chunk.document_name}({chunk.document_section})",
+                'title': chunk.document_title,
+                'section': chunk.section_name,
+                'similarity': chunk.similarity
             })
         
         return {
@@ -190,4 +676,4 @@ Please provide a detailed answer based on the context above. If the context does
     
     def get_random_loading_message(self) -> str:
         """Get a random funny loading message."""
-        return random.choice(settings.FUNNY_LOADING_SENTENCES)
+        return random_loading_message()
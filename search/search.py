@@ -1,79 +1,386 @@
-from django.db.models import Q, F
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, F
+from django.db.models.functions import Substr
 from django.conf import settings
 
-from search.models import Chunk, Document
-from search.qdrant_service import QdrantService
+from search.models import Chunk, Document, SectionStats
+from search.qdrant_service import get_qdrant_service
+
+
+_lock = threading.Lock()
+_shared_searcher = None
+
+# Document/chunk statistics change only when data is imported. They live in
+# the default cache, which is LocMemCache and so per process: deleting the
+# key only refreshes the deleting process, and running web processes pick
+# up new counts when their entry expires after DOCUMENT_STATS_CACHE_TIMEOUT
+DOCUMENT_STATS_CACHE_KEY = 'manpage_stats'
+DOCUMENT_STATS_CACHE_TIMEOUT = 300
+
+# Search types: 'vector' rescores int8 candidates with the original
+# vectors, 'vector_fast' ranks by the int8 index alone (faster, with
+# slightly approximate scores)
+SEARCH_TYPES = ('vector', 'vector_fast')
+
+# Payload fields written by QdrantService.metadata_for_chunk; results whose
+# payload has all of them are hydrated without touching the database
+PAYLOAD_FIELDS = frozenset([
+    'document_name', 'document_section', 'document_title', 'section_name',
+    'anchor', 'token_count', 'version_tag',
+])
+
+
+# Columns read by search consumers; other Chunk/Document columns are deferred
+CHUNK_FIELDS = (
+    'id', 'text', 'section_name', 'anchor', 'token_count', 'qdrant_id',
+    'document__name', 'document__section', 'document__title',
+)
+
+# Columns of the rows returned by search_chunks(values=True), besides
+# 'text' and 'similarity'
+ROW_FIELDS = ('id', 'section_name', 'anchor', 'token_count', 'qdrant_id')
+ROW_DOCUMENT_FIELDS = {
+    'document_name': F('document__name'),
+    'document_section': F('document__section'),
+    'document_title': F('document__title'),
+}
+
+
+@dataclass
+class PayloadDocument:
+    """Document fields carried in a Qdrant point payload."""
+    name: str
+    section: str
+    title: str
+    version_tag: str
+
+
+@dataclass
+class PayloadChunk:
+    """A search hit built from its Qdrant payload, exposing the Chunk attributes callers read."""
+    id: uuid.UUID
+    document: PayloadDocument
+    section_name: str
+    anchor: str
+    text: str
+    token_count: int
+    qdrant_id: Optional[uuid.UUID]
+    similarity: float
+    preview: Optional[str] = None
+
+
+def _preview(text, preview_length):
+    """Cut text to preview_length characters, marking cut text with '...'."""
+    if len(text) > preview_length:
+        return text[:preview_length] + '...'
+    return text
+
+
+def _with_preview(queryset, preview_length):
+    """
+    Load a preview of the chunk text in SQL instead of the full text.
+    
+    One character more than preview_length is fetched so _finish_preview
+    can tell whether the text was cut.
+    """
+    if preview_length is None:
+        return queryset
+    return queryset.defer('text').annotate(preview=Substr('text', 1, preview_length + 1))
+
+
+def _finish_preview(chunk, preview_length):
+    """Turn the SQL preview of a chunk loaded through _with_preview into its display form."""
+    if preview_length is not None:
+        chunk.preview = _preview(chunk.preview, preview_length)
+    return chunk
+
+
+def refresh_section_stats():
+    """
+    Recount the chunks per section name into SectionStats.
+    
+    Run after importing or deleting chunks. Also drops the cached document
+    statistics of this process; running web processes keep theirs for up
+    to DOCUMENT_STATS_CACHE_TIMEOUT seconds.
+    """
+    with transaction.atomic():
+        SectionStats.objects.all().delete()
+        SectionStats.objects.bulk_create([
+            SectionStats(section_name=row['section_name'], count=row['count'])
+            for row in Chunk.objects.values('section_name').annotate(count=Count('id')).order_by()
+        ])
+    cache.delete(DOCUMENT_STATS_CACHE_KEY)
+
+
+def _chunk_rows(queryset, preview_length):
+    """Turn a Chunk queryset into a values() queryset of search result rows."""
+    if preview_length is None:
+        return queryset.values(*ROW_FIELDS, 'text', **ROW_DOCUMENT_FIELDS)
+    return queryset.annotate(
+        preview=Substr('text', 1, preview_length + 1)
+    ).values(*ROW_FIELDS, 'preview', **ROW_DOCUMENT_FIELDS)
+
+
+def _finish_row(row, preview_length, similarity=None):
+    """Complete a row from _chunk_rows with its display text and similarity."""
+    if preview_length is not None:
+        row['text'] = _preview(row.pop('preview'), preview_length)
+    row['similarity'] = similarity
+    return row
+
+
+def get_searcher() -> 'ManPageSearch':
+    """Return the process-wide ManPageSearch, creating it on first use."""
+    global _shared_searcher
+    # Once created, the instance is returned without taking the lock
+    if _shared_searcher is not None:
+        return _shared_searcher
+    with _lock:
+        if _shared_searcher is None:
+            _shared_searcher = ManPageSearch()
+        return _shared_searcher
 
 
 class ManPageSearch:
     """Utility class for searching man-pages with vector search using Qdrant."""
     
     def __init__(self):
-        self.qdrant_service = QdrantService()
+        self.qdrant_service = get_qdrant_service()
     
-    def search_chunks(self, query, search_type='vector', limit=20, score_threshold=0.7):
+    def search_chunks(self, query, search_type='vector', limit=20, score_threshold=0.7, query_vector=None,
+                      hnsw_ef=None, oversampling=None, preview_length=None, values=False, coalesce=False,
+                      fallback=True):
         """
         Search chunks using vector similarity search.
         
         Args:
             query (str): Search query
-            search_type (str): 'vector' (only supported type now)
+            search_type (str): One of SEARCH_TYPES
             limit (int): Maximum number of results
             score_threshold (float): Minimum similarity score
+            query_vector (list): Precomputed embedding of query, if available
+            hnsw_ef (int): HNSW beam width; higher trades latency for recall
+            oversampling (float): int8 candidates per result rescored with the original vectors
+            preview_length (int): If set, give each chunk a `preview` of at most this many
+                characters (plus '...'); chunks loaded from the database then skip the full text
+            values (bool): Return plain dictionaries instead of chunk objects, with the keys
+                of ROW_FIELDS and ROW_DOCUMENT_FIELDS plus 'text' (the preview, if requested)
+                and 'similarity'
+            coalesce (bool): Send the Qdrant search in one batch request together with other
+                concurrent searches of this process; suits many parallel interactive requests
+            fallback (bool): Fall back to full-text search when Qdrant fails; if False the
+                error is raised instead
         
         Returns:
             QuerySet: Filtered chunks with search results
         """
-        if search_type == 'vector':
-            return self._vector_search(query, limit, score_threshold)
+        if search_type in SEARCH_TYPES:
+            return self._vector_search(query, limit, score_threshold, query_vector, hnsw_ef, oversampling,
+                                       preview_length, values, rescore=search_type == 'vector', coalesce=coalesce,
+                                       fallback=fallback)
         else:
-            raise ValueError("search_type must be 'vector'")
+            raise ValueError(f"search_type must be one of {', '.join(SEARCH_TYPES)}")
+    
+    def search_chunks_batch(self, queries, search_type='vector', limit=20, score_threshold=0.7, fallback=True):
+        """
+        Search chunks for several queries at once.
+        
+        Args:
+            queries (list): Search queries
+            search_type (str): One of SEARCH_TYPES
+            limit (int): Maximum number of results per query
+            score_threshold (float): Minimum similarity score
+            fallback (bool): Fall back to full-text search when Qdrant fails; if False the
+                error is raised instead
+        
+        Returns:
+            List: One ordered chunk list per query
+        """
+        if search_type not in SEARCH_TYPES:
+            raise ValueError(f"search_type must be one of {', '.join(SEARCH_TYPES)}")
+        
+        try:
+            batch_results = self.qdrant_service.search_similar_batch(
+                queries=queries,
+                limit=limit,
+                score_threshold=score_threshold,
+                rescore=search_type == 'vector'
+            )
+        except Exception:
+            if not fallback:
+                raise
+            # Fallback to text search if Qdrant fails
+            return [self._fallback_text_search(query, limit) for query in queries]
+        
+        return [self._hydrate_results(qdrant_results) for qdrant_results in batch_results]
     
-    def _vector_search(self, query, limit, score_threshold):
+    def _vector_search(self, query, limit, score_threshold, query_vector=None, hnsw_ef=None, oversampling=None,
+                       preview_length=None, values=False, rescore=True, coalesce=False, fallback=True):
         """Perform vector similarity search using Qdrant."""
         try:
             # Search in Qdrant
             qdrant_results = self.qdrant_service.search_similar(
                 query=query,
                 limit=limit,
-                score_threshold=score_threshold
+                score_threshold=score_threshold,
+                query_vector=query_vector,
+                hnsw_ef=hnsw_ef,
+                oversampling=oversampling,
+                rescore=rescore,
+                coalesce=coalesce
             )
             
-            if not qdrant_results:
-                return Chunk.objects.none()
-            
-            # Get chunk IDs from Qdrant results
-            chunk_ids = [result['chunk_id'] for result in qdrant_results]
+            return self._hydrate_results(qdrant_results, preview_length, values)
             
-            # Get chunks from database and preserve order
-            chunks = Chunk.objects.filter(id__in=chunk_ids).select_related('document')
-            
-            # Create a mapping to preserve Qdrant order and scores
-            chunk_map = {str(chunk.id): chunk for chunk in chunks}
-            ordered_chunks = []
-            
-            for result in qdrant_results:
-                chunk_id = result['chunk_id']
-                if chunk_id in chunk_map:
-                    chunk = chunk_map[chunk_id]
-                    # Add similarity score as an attribute
-                    chunk.similarity = result['score']
-                    ordered_chunks.append(chunk)
-            
-            return ordered_chunks
-            
-        except Exception as e:
+        except Exception:
+            if not fallback:
+                raise
             # Fallback to text search if Qdrant fails
-            return self._fallback_text_search(query, limit)
+            return self._fallback_text_search(query, limit, preview_length, values)
     
-    def _fallback_text_search(self, query, limit):
-        """Fallback text search when Qdrant is unavailable."""
-        return Chunk.objects.filter(
-            Q(text__icontains=query) |
-            Q(section_name__icontains=query) |
-            Q(document__name__icontains=query) |
-            Q(document__title__icontains=query)
-        ).select_related('document')[:limit]
+    def _hydrate_results(self, qdrant_results, preview_length=None, values=False):
+        """
+        Build the chunks for Qdrant results, preserving Qdrant order and scores.
+        
+        Points indexed with the full payload are turned into PayloadChunks
+        (or rows) directly, saving a database round trip per search; results
+        missing payload fields are loaded from the database instead.
+        """
+        if not qdrant_results:
+            return [] if values else Chunk.objects.none()
+        
+        if values:
+            return self._hydrate_rows(qdrant_results, preview_length)
+        
+        if all(PAYLOAD_FIELDS.issubset(result['metadata']) for result in qdrant_results):
+            chunks = [self._chunk_from_payload(result) for result in qdrant_results]
+            if preview_length is not None:
+                for chunk in chunks:
+                    chunk.preview = _preview(chunk.text, preview_length)
+            return chunks
+        
+        chunks = self._load_chunks(qdrant_results, preview_length)
+        ordered_chunks = []
+        
+        for result in qdrant_results:
+            chunk = chunks.get(result['chunk_id'])
+            if chunk is not None:
+                # Add similarity score as an attribute
+                chunk.similarity = result['score']
+                ordered_chunks.append(chunk)
+        
+        return ordered_chunks
+    
+    def _hydrate_rows(self, qdrant_results, preview_length=None):
+        """Build search result rows for Qdrant results, preserving Qdrant order and scores."""
+        if all(PAYLOAD_FIELDS.issubset(result['metadata']) for result in qdrant_results):
+            return [self._row_from_payload(result, preview_length) for result in qdrant_results]
+        
+        queryset = Chunk.objects.filter(id__in={result['chunk_id'] for result in qdrant_results})
+        rows = {str(row['id']): row for row in _chunk_rows(queryset, preview_length)}
+        return [
+            _finish_row(rows[result['chunk_id']], preview_length, result['score'])
+            for result in qdrant_results
+            if result['chunk_id'] in rows
+        ]
+    
+    @staticmethod
+    def _row_from_payload(result, preview_length=None):
+        """Build a search result row from a Qdrant result dictionary."""
+        metadata = result['metadata']
+        point_id = result.get('point_id')
+        text = result['text']
+        return {
+            'id': uuid.UUID(result['chunk_id']),
+            'section_name': metadata['section_name'],
+            'anchor': metadata['anchor'],
+            'token_count': metadata['token_count'],
+            'qdrant_id': uuid.UUID(point_id) if point_id else None,
+            'document_name': metadata['document_name'],
+            'document_section': metadata['document_section'],
+            'document_title': metadata['document_title'],
+            'text': _preview(text, preview_length) if preview_length is not None else text,
+            'similarity': result['score'],
+        }
+    
+    @staticmethod
+    def _chunk_from_payload(result):
+        """Build a PayloadChunk from a Qdrant result dictionary."""
+        metadata = result['metadata']
+        point_id = result.get('point_id')
+        return PayloadChunk(
+            id=uuid.UUID(result['chunk_id']),
+            document=PayloadDocument(
+                name=metadata['document_name'],
+                section=metadata['document_section'],
+                title=metadata['document_title'],
+                version_tag=metadata['version_tag'],
+            ),
+            section_name=metadata['section_name'],
+            anchor=metadata['anchor'],
+            text=result['text'],
+            token_count=metadata['token_count'],
+            qdrant_id=uuid.UUID(point_id) if point_id else None,
+            similarity=result['score'],
+        )
+    
+    def _load_chunks(self, qdrant_results, preview_length=None):
+        """Fetch the chunks referenced by Qdrant results in one query, keyed by the payload chunk_id."""
+        chunk_ids = {result['chunk_id'] for result in qdrant_results}
+        queryset = _with_preview(Chunk.objects.select_related('document').only(*CHUNK_FIELDS), preview_length)
+        chunks = queryset.in_bulk(list(chunk_ids))
+        return {str(pk): _finish_preview(chunk, preview_length) for pk, chunk in chunks.items()}
+    
+    def _fallback_text_search(self, query, limit, preview_length=None, values=False):
+        """
+        Fallback text search when Qdrant is unavailable.
+        
+        Chunk text and section names are matched through the GIN-indexed
+        search_vector; chunks of documents whose name or title match are
+        included too. Results are ordered by full-text rank.
+        """
+        config = settings.POSTGRES_FULL_TEXT_SEARCH_CONFIG
+        search_query = SearchQuery(query, config=config, search_type='websearch')
+        matching_documents = Document.objects.filter(
+            Q(name__icontains=query) | Q(title__icontains=query)
+        ).values('id')
+        
+        queryset = Chunk.objects.filter(
+            Q(search_vector=search_query) |
+            Q(document__in=matching_documents)
+        ).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank')
+        
+        if values:
+            return [_finish_row(row, preview_length) for row in _chunk_rows(queryset, preview_length)[:limit]]
+        
+        queryset = queryset.select_related('document').only(*CHUNK_FIELDS)
+        if preview_length is None:
+            return queryset[:limit]
+        return [_finish_preview(chunk, preview_length) for chunk in _with_preview(queryset, preview_length)[:limit]]
+    
+    def text_search(self, query, limit=20, preview_length=None, values=False):
+        """
+        Full-text search over chunks, the fallback used when Qdrant fails.
+        
+        Args:
+            query (str): Search query
+            limit (int): Maximum number of results
+            preview_length (int): As for search_chunks
+            values (bool): As for search_chunks
+        
+        Returns:
+            QuerySet: Matching chunks, best full-text rank first
+        """
+        return self._fallback_text_search(query, limit, preview_length, values)
     
     def search_by_document(self, document_name=None, section=None, version_tag=None):
         """
@@ -96,7 +403,7 @@ class ManPageSearch:
         if version_tag:
             filters['document__version_tag'] = version_tag
         
-        return Chunk.objects.filter(**filters).select_related('document')
+        return Chunk.objects.filter(**filters).select_related('document').only(*CHUNK_FIELDS)
     
     def search_by_section(self, section_name):
         """
@@ -110,9 +417,9 @@ class ManPageSearch:
         """
         return Chunk.objects.filter(
             section_name__icontains=section_name
-        ).select_related('document')
+        ).select_related('document').only(*CHUNK_FIELDS)
     
-    def search_with_filters(self, query, filters=None, limit=20, score_threshold=0.7):
+    def search_with_filters(self, query, filters=None, limit=20, score_threshold=0.7, hydrate=False):
         """
         Search with additional filters using Qdrant.
         
@@ -121,6 +428,7 @@ class ManPageSearch:
             filters (dict): Additional filters to apply
             limit (int): Maximum number of results
             score_threshold (float): Minimum similarity score
+            hydrate (bool): Attach the matching Chunk to each result as 'chunk'
         
         Returns:
             List: Search results with similarity scores
@@ -140,15 +448,22 @@ class ManPageSearch:
                     if key in field_mapping:
                         qdrant_filters[field_mapping[key]] = value
             
-            return self.qdrant_service.search_with_filters(
+            results = self.qdrant_service.search_with_filters(
                 query=query,
                 filters=qdrant_filters,
                 limit=limit
             )
             
+            if hydrate:
+                chunks = self._load_chunks(results)
+                for result in results:
+                    result['chunk'] = chunks.get(result['chunk_id'])
+            
+            return results
+            
         except Exception as e:
             # Fallback to database search
-            queryset = Chunk.objects.select_related('document')
+            queryset = Chunk.objects.select_related('document').only(*CHUNK_FIELDS)
             if filters:
                 for key, value in filters.items():
                     if hasattr(Chunk, key):
@@ -160,24 +475,36 @@ class ManPageSearch:
             return queryset[:limit]
     
     def get_document_stats(self):
-        """Get statistics about documents and chunks."""
-        from django.db.models import Count
-        
-        total_documents = Document.objects.count()
-        total_chunks = Chunk.objects.count()
+        """Get statistics about documents and chunks, cached for DOCUMENT_STATS_CACHE_TIMEOUT seconds."""
+        return cache.get_or_set(DOCUMENT_STATS_CACHE_KEY, self._compute_document_stats, DOCUMENT_STATS_CACHE_TIMEOUT)
+    
+    def _compute_document_stats(self):
+        """Compute statistics about documents and chunks."""
+        # Documents and chunks are counted in one query over the document/chunk join
+        counts = Document.objects.aggregate(
+            total_documents=Count('id', distinct=True),
+            total_chunks=Count('chunks')
+        )
+        total_documents = counts['total_documents']
+        total_chunks = counts['total_chunks']
         
-        # Calculate average chunks per document manually
         avg_chunks_per_document = 0
         if total_documents > 0:
             avg_chunks_per_document = total_chunks / total_documents
         
+        # Section counts are precomputed by refresh_section_stats; the
+        # GROUP BY over all chunks only runs if they were never refreshed
+        sections = list(SectionStats.objects.order_by('-count').values('section_name', 'count')[:10])
+        if not sections and total_chunks:
+            sections = list(Chunk.objects.values('section_name').annotate(
+                count=Count('id')
+            ).order_by('-count')[:10])
+        
         stats = {
             'total_documents': total_documents,
             'total_chunks': total_chunks,
             'avg_chunks_per_document': avg_chunks_per_document,
-            'sections': Chunk.objects.values('section_name').annotate(
-                count=Count('id')
-            ).order_by('-count')[:10],
+            'sections': sections,
             'qdrant_info': self.qdrant_service.get_collection_info()
         }
         
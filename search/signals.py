@@ -0,0 +1,19 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Document
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def invalidate_document_stats(sender, **kwargs):
+    """
+    Drop this process's cached document statistics when a document is saved or deleted.
+    
+    Other processes keep their cached statistics until they expire
+    (DOCUMENT_STATS_CACHE_TIMEOUT).
+    """
+    # Imported here so loading the app does not load the embedding model stack
+    from .search import DOCUMENT_STATS_CACHE_KEY
+    cache.delete(DOCUMENT_STATS_CACHE_KEY)
@@ -8,6 +8,8 @@ urlpatterns = [
     path("api/", views.search_api, name="search-api"),
     path("ask/", views.ask_view, name="ask"),
     path("ask-api/", views.ask_api, name="ask-api"),
+    path("ask-batch-api/", views.ask_batch_api, name="ask-batch-api"),
+    path("ask-api/cache/clear/", views.ask_cache_clear_api, name="ask-cache-clear"),
     path("loading-message/", views.loading_message_api, name="loading-message"),
     
     # Admin-only evaluation views
@@ -1,22 +1,60 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models import Avg, Count, Q
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Avg, Case, CharField, Count, F, FloatField, Max, Q, Value, When
+from django.db.models.functions import Cast, Coalesce, Concat, Substr, TruncDate
+from django.core.cache import cache
 from django.utils import timezone
-import json
+from django.views.decorators.cache import never_cache
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
+import hashlib
 
-from .search import ManPageSearch
-from .rag_service import ManPageRAGService
+import orjson
+
+from .search import get_searcher
+from .rag_service import ANSWER_ERROR_PREFIX, get_service, loading_messages, random_loading_message
 from .models import EvaluationRun, EvaluationResult, EvaluationQuery
+from .evaluation_utils import rank_distribution_for_run
+
+
+# Upper bound on questions accepted by ask_batch_api in one request
+MAX_BATCH_QUESTIONS = 20
+
+# Search type of the search page and API when none is given; the int8
+# index alone is fast enough for interactive search, 'vector' rescores
+DEFAULT_SEARCH_TYPE = 'vector_fast'
+
+# Characters of chunk text shown per result on the HTML search page
+SEARCH_PREVIEW_LENGTH = 500
+
+# Seconds that search_api responses are reused for identical searches
+SEARCH_CACHE_TIMEOUT = 60
+
+# Results shown per page on the evaluation run detail page, and the
+# characters of each error message shown
+EVALUATION_RESULTS_PER_PAGE = 50
+ERROR_PREVIEW_LENGTH = 50
+
+# Series of the evaluation comparison chart, in the column order of its query
+CHART_SERIES = ('labels', 'recall_at_5', 'ndcg_at_5', 'mrr', 'success_rate')
+
+# Seconds that ask_api answers are reused for the same normalized question;
+# bumping the version stored under ASK_CACHE_VERSION_KEY drops them all.
+# Both live in the default cache, which is LocMemCache and so per process.
+ASK_CACHE_TIMEOUT = 600
+ASK_CACHE_VERSION_KEY = 'ask_api:version'
 
 
 @login_required
 def search_view(request):
     """Search man-pages with vector similarity search"""
     query = request.GET.get('q', '').strip()
-    search_type = request.GET.get('type', 'vector')
+    search_type = request.GET.get('type', DEFAULT_SEARCH_TYPE)
     limit = int(request.GET.get('limit', 20))
     score_threshold = float(request.GET.get('threshold', 0.7))
     
@@ -24,24 +62,11 @@ def search_view(request):
     stats = None
     
     if query:
-        searcher = ManPageSearch()
-        chunks = searcher.search_chunks(query, search_type, limit, score_threshold)
-        
-        # Convert to serializable format
-        results = []
-        for chunk in chunks:
-            results.append({
-                'id': str(chunk.id),
-                'document_name': chunk.document.name,
-                'document_section': chunk.document.section,
-                'document_title': chunk.document.title,
-                'section_name': chunk.section_name,
-                'anchor': chunk.anchor,
-                'text': chunk.text[:500] + '...' if len(chunk.text) > 500 else chunk.text,
-                'token_count': chunk.token_count,
-                'similarity': getattr(chunk, 'similarity', None),
-                'qdrant_id': chunk.qdrant_id,
-            })
+        searcher = get_searcher()
+        # Rows come from the Qdrant payload, or from one chunk/document join
+        # query; the page costs at most that query plus the cached stats
+        results = searcher.search_chunks(query, search_type, limit, score_threshold,
+                                         preview_length=SEARCH_PREVIEW_LENGTH, values=True, coalesce=True)
         
         stats = searcher.get_document_stats()
     
@@ -56,42 +81,60 @@ def search_view(request):
     return render(request, "search/search.html", context)
 
 
+class OrjsonResponse(HttpResponse):
+    """JSON response serialized with orjson (handles UUIDs, datetimes and dataclasses natively)."""
+    
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(orjson.dumps(data), **kwargs)
+
+
+def _search_api_results(query, search_type, limit, score_threshold):
+    """
+    Return serialized search results, cached for SEARCH_CACHE_TIMEOUT seconds per distinct search.
+    
+    When Qdrant fails, full-text results are returned instead; they are not
+    cached, so vector results are served again as soon as Qdrant recovers.
+    """
+    key_source = orjson.dumps([query, search_type, limit, score_threshold])
+    cache_key = f"search_api:{hashlib.sha256(key_source).hexdigest()}"
+    
+    results = cache.get(cache_key)
+    if results is not None:
+        return results
+    
+    searcher = get_searcher()
+    try:
+        results = searcher.search_chunks(query, search_type, limit, score_threshold, values=True, coalesce=True,
+                                         fallback=False)
+    except Exception:
+        return searcher.text_search(query, limit, values=True)
+    
+    cache.set(cache_key, results, SEARCH_CACHE_TIMEOUT)
+    return results
+
+
 @csrf_exempt
+@gzip_page
 @login_required
 def search_api(request):
     """API endpoint for search functionality"""
     if request.method != 'POST':
-        return JsonResponse({'error': 'POST method required'}, status=405)
+        return OrjsonResponse({'error': 'POST method required'}, status=405)
     
     try:
-        data = json.loads(request.body)
+        data = orjson.loads(request.body)
         query = data.get('query', '').strip()
-        search_type = data.get('type', 'vector')
+        search_type = data.get('type', DEFAULT_SEARCH_TYPE)
         limit = int(data.get('limit', 20))
         score_threshold = float(data.get('threshold', 0.7))
         
         if not query:
-            return JsonResponse({'error': 'Query is required'}, status=400)
+            return OrjsonResponse({'error': 'Query is required'}, status=400)
         
-        searcher = ManPageSearch()
-        chunks = searcher.search_chunks(query, search_type, limit, score_threshold)
+        results = _search_api_results(query, search_type, limit, score_threshold)
         
-        results = []
-        for chunk in chunks:
-            results.append({
-                'id': str(chunk.id),
-                'document_name': chunk.document.name,
-                'document_section': chunk.document.section,
-                'document_title': chunk.document.title,
-                'section_name': chunk.section_name,
-                'anchor': chunk.anchor,
-                'text': chunk.text,
-                'token_count': chunk.token_count,
-                'similarity': getattr(chunk, 'similarity', None),
-                'qdrant_id': chunk.qdrant_id,
-            })
-        
-        return JsonResponse({
+        return OrjsonResponse({
             'results': results,
             'total': len(results),
             'query': query,
@@ -99,19 +142,17 @@ def search_api(request):
             'score_threshold': score_threshold
         })
         
-    except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except orjson.JSONDecodeError:
+        return OrjsonResponse({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return OrjsonResponse({'error': str(e)}, status=500)
 
 
 @login_required
 def ask_view(request):
     """Ask questions and get answers using RAG workflow"""
-    from django.conf import settings
-    import json
     context = {
-        'loading_messages_json': json.dumps(settings.FUNNY_LOADING_SENTENCES)
+        'loading_messages': loading_messages()
     }
     return render(request, "search/ask.html", context)
 
@@ -121,54 +162,193 @@ def ask_view(request):
 def ask_api(request):
     """API endpoint for asking questions with RAG"""
     if request.method != 'POST':
-        return JsonResponse({'error': 'POST method required'}, status=405)
+        return OrjsonResponse({'error': 'POST method required'}, status=405)
     
     try:
-        data = json.loads(request.body)
+        data = orjson.loads(request.body)
         question = data.get('question', '').strip()
         
         if not question:
-            return JsonResponse({'error': 'Question is required'}, status=400)
+            return OrjsonResponse({'error': 'Question is required'}, status=400)
+        
+        rag_service = get_service()
         
-        rag_service = ManPageRAGService()
-        result = rag_service.ask_question(question)
+        if 'text/event-stream' in request.headers.get('Accept', ''):
+            # Send sources first, then the answer token by token as server-sent events
+            response = StreamingHttpResponse(
+                _sse_events(rag_service.stream_answer(question)),
+                content_type='text/event-stream'
+            )
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
         
-        return JsonResponse(result)
+        cache_key = _ask_cache_key(question)
+        result = cache.get(cache_key)
+        if result is None:
+            result = rag_service.ask_question_cached(question)
+            if not result['answer'].startswith(ANSWER_ERROR_PREFIX):
+                cache.set(cache_key, result, ASK_CACHE_TIMEOUT)
+        else:
+            result = {**result, 'question': question}
         
-    except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        return OrjsonResponse(result)
+        
+    except orjson.JSONDecodeError:
+        return OrjsonResponse({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return OrjsonResponse({'error': str(e)}, status=500)
+
+
+def _ask_cache_key(question):
+    """Cache key of the ask_api answer for question, ignoring case and whitespace."""
+    normalized = ' '.join(question.lower().split())
+    version = cache.get_or_set(ASK_CACHE_VERSION_KEY, 1, None)
+    digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+    return f"ask_api:{version}:{digest}"
+
+
+@csrf_exempt
+@staff_member_required
+def ask_cache_clear_api(request):
+    """
+    API endpoint that drops the cached ask_api answers of the serving process.
+    
+    The exact-answer cache (the default LocMemCache) and the semantic cache
+    are both per process; with several workers, the others keep their
+    answers until they expire (ASK_CACHE_TIMEOUT, SEMANTIC_CACHE_TIMEOUT).
+    """
+    if request.method != 'POST':
+        return OrjsonResponse({'error': 'POST method required'}, status=405)
+    
+    cache.get_or_set(ASK_CACHE_VERSION_KEY, 1, None)
+    cache.incr(ASK_CACHE_VERSION_KEY)
+    get_service().semantic_cache.clear()
+    return OrjsonResponse({'cleared': True})
+
+
+def _sse_events(events):
+    """Encode answer events as server-sent events."""
+    for event in events:
+        yield f"event: {event['event']}\ndata: {orjson.dumps(event['data']).decode('utf-8')}\n\n"
 
 
 @csrf_exempt
 @login_required
+def ask_batch_api(request):
+    """API endpoint for asking several questions with RAG in one request"""
+    if request.method != 'POST':
+        return OrjsonResponse({'error': 'POST method required'}, status=405)
+    
+    try:
+        data = orjson.loads(request.body)
+        if isinstance(data, dict):
+            data = data.get('questions')
+        if not isinstance(data, list) or not all(isinstance(question, str) for question in data):
+            return OrjsonResponse({'error': 'A list of questions is required'}, status=400)
+        
+        questions = [question.strip() for question in data]
+        if not questions or not all(questions):
+            return OrjsonResponse({'error': 'Questions must not be empty'}, status=400)
+        if len(questions) > MAX_BATCH_QUESTIONS:
+            return OrjsonResponse({'error': f'At most {MAX_BATCH_QUESTIONS} questions per request'}, status=400)
+        
+        rag_service = get_service()
+        results = rag_service.ask_questions_batch(questions)
+        
+        return OrjsonResponse({'results': results})
+        
+    except orjson.JSONDecodeError:
+        return OrjsonResponse({'error': 'Invalid JSON'}, status=400)
+    except Exception as e:
+        return OrjsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@login_required
+@never_cache
 def loading_message_api(request):
     """API endpoint to get random loading messages"""
     try:
-        rag_service = ManPageRAGService()
-        message = rag_service.get_random_loading_message()
-        return JsonResponse({'message': message})
+        # Served from settings alone, without starting the RAG service
+        return OrjsonResponse({'message': random_loading_message()})
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return OrjsonResponse({'error': str(e)}, status=500)
+
+
+def _runs_etag():
+    """
+    ETag of the evaluation run list, or None while a run is in progress.
+    
+    Every save of a run (creation, completion, admin edits) bumps its
+    updated_at, and deletions lower the run count.
+    """
+    state = EvaluationRun.objects.aggregate(
+        total=Count('id'),
+        running=Count('id', filter=Q(status='running')),
+        latest_updated=Max('updated_at'),
+    )
+    if state['running']:
+        return None
+    key = f"{state['total']}:{state['latest_updated']}"
+    return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
+def _dashboard_etag(request):
+    """ETag of the evaluation dashboard and comparison pages, which also show the current user."""
+    etag = _runs_etag()
+    return f"{etag}:{request.user.pk}" if etag else None
+
+
+def _evaluation_api_etag(request):
+    """ETag of an evaluation_api response; a single run's results are fixed once it has finished."""
+    run_id = request.GET.get('run_id')
+    if not run_id:
+        return _runs_etag()
+    updated_at = _evaluation_api_last_modified(request)
+    if updated_at is None:
+        return None
+    return hashlib.md5(f"{run_id}:{updated_at.isoformat()}".encode('utf-8')).hexdigest()
+
+
+def _evaluation_api_last_modified(request):
+    """When the finished run requested from evaluation_api last changed, or None for run lists and unfinished runs."""
+    run_id = request.GET.get('run_id')
+    if not run_id:
+        return None
+    try:
+        return EvaluationRun.objects.filter(
+            id=run_id, completed_at__isnull=False
+        ).values_list('updated_at', flat=True).first()
+    except ValidationError:
+        return None
 
 
 # Admin-only evaluation views
 @staff_member_required
+@condition(etag_func=_dashboard_etag)
 def evaluation_dashboard(request):
     """Dashboard showing all evaluation runs and their metrics"""
     evaluation_runs = EvaluationRun.objects.all().order_by('-created_at')
     
-    # Get summary statistics
-    total_runs = evaluation_runs.count()
-    completed_runs = evaluation_runs.filter(status='completed').count()
-    running_runs = evaluation_runs.filter(status='running').count()
-    failed_runs = evaluation_runs.filter(status='failed').count()
+    # Get summary statistics in one query
+    counts = evaluation_runs.aggregate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(status='completed')),
+        running=Count('id', filter=Q(status='running')),
+        failed=Count('id', filter=Q(status='failed')),
+    )
+    total_runs = counts['total']
+    completed_runs = counts['completed']
+    running_runs = counts['running']
+    failed_runs = counts['failed']
     
     # Get latest metrics if any completed runs exist
     latest_metrics = None
     if completed_runs > 0:
-        latest_run = evaluation_runs.filter(status='completed').first()
+        latest_run = evaluation_runs.filter(status='completed').only(
+            'recall_at_5', 'ndcg_at_5', 'mrr', 'total_queries', 'successful_queries'
+        ).first()
         latest_metrics = {
             'recall_at_5': latest_run.recall_at_5,
             'ndcg_at_5': latest_run.ndcg_at_5,
@@ -193,7 +373,7 @@ def evaluation_dashboard(request):
 def evaluation_run_detail(request, run_id):
     """Detailed view of a specific evaluation run"""
     evaluation_run = get_object_or_404(EvaluationRun, id=run_id)
-    results = evaluation_run.results.all().order_by('-created_at')
+    results = evaluation_run.results.all()
     
     # Calculate additional statistics
     results_stats = results.aggregate(
@@ -205,13 +385,22 @@ def evaluation_run_detail(request, run_id):
         found_results=Count('id', filter=Q(target_chunk_found=True)),
     )
     
-    # Get distribution of ranks for found chunks
-    rank_distribution = {}
-    for result in results.filter(target_chunk_found=True):
-        rank = result.target_chunk_rank
-        if rank:
-            rank_range = f"{(rank-1)//5*5 + 1}-{((rank-1)//5 + 1)*5}"
-            rank_distribution[rank_range] = rank_distribution.get(rank_range, 0) + 1
+    # Get distribution of ranks for found chunks; completed runs store it,
+    # older and unfinished runs are counted in SQL
+    rank_distribution = evaluation_run.rank_distribution
+    if rank_distribution is None:
+        rank_distribution = rank_distribution_for_run(evaluation_run)
+    rank_distribution = dict(rank_distribution)
+    
+    # Only one page of results is loaded, with its queries joined in; the
+    # retrieved chunk lists are not shown and error messages are cut in SQL
+    paginator = Paginator(
+        results.select_related('query').defer('retrieved_chunks', 'error_message').annotate(
+            error_preview=Substr('error_message', 1, ERROR_PREVIEW_LENGTH + 1)
+        ).order_by('-created_at'),
+        EVALUATION_RESULTS_PER_PAGE
+    )
+    page_obj = paginator.get_page(request.GET.get('page'))
     
     # Calculate success rate percentage
     success_rate = None
@@ -220,7 +409,8 @@ def evaluation_run_detail(request, run_id):
     
     context = {
         'evaluation_run': evaluation_run,
-        'results': results,
+        'results': page_obj.object_list,
+        'page_obj': page_obj,
         'results_stats': results_stats,
         'rank_distribution': rank_distribution,
         'success_rate': success_rate,
@@ -229,37 +419,84 @@ def evaluation_run_detail(request, run_id):
     return render(request, "search/evaluation_run_detail.html", context)
 
 
+@gzip_page
 @staff_member_required
+@condition(etag_func=_dashboard_etag)
 def evaluation_comparison(request):
     """Compare metrics across different evaluation runs"""
-    evaluation_runs = EvaluationRun.objects.filter(status='completed').order_by('-created_at')
-    
-    # Prepare data for charts
-    chart_data = {
-        'labels': [],
-        'recall_at_5': [],
-        'ndcg_at_5': [],
-        'mrr': [],
-        'success_rate': [],
-    }
+    evaluation_runs = EvaluationRun.objects.filter(status='completed').only(
+        'name', 'created_at', 'search_type', 'total_queries', 'successful_queries',
+        'recall_at_1', 'recall_at_5', 'recall_at_10', 'recall_at_20',
+        'ndcg_at_1', 'ndcg_at_5', 'ndcg_at_10', 'ndcg_at_20', 'mrr',
+    ).order_by('-created_at')
     
-    for run in evaluation_runs:
-        chart_data['labels'].append(f"{run.name} ({run.created_at.strftime('%Y-%m-%d')})")
-        chart_data['recall_at_5'].append(float(run.recall_at_5) if run.recall_at_5 else 0)
-        chart_data['ndcg_at_5'].append(float(run.ndcg_at_5) if run.ndcg_at_5 else 0)
-        chart_data['mrr'].append(float(run.mrr) if run.mrr else 0)
-        success_rate = (run.successful_queries / run.total_queries * 100) if run.total_queries > 0 else 0
-        chart_data['success_rate'].append(success_rate)
+    # Prepare data for charts; labels, missing metrics and success rates
+    # are computed by the database, one row per run
+    chart_rows = evaluation_runs.values_list(
+        Concat('name', Value(' ('), Cast(TruncDate('created_at'), CharField()), Value(')')),
+        Coalesce('recall_at_5', 0.0),
+        Coalesce('ndcg_at_5', 0.0),
+        Coalesce('mrr', 0.0),
+        Case(
+            When(total_queries__gt=0, then=F('successful_queries') * 100.0 / F('total_queries')),
+            default=0.0,
+            output_field=FloatField()
+        ),
+    )
+    columns = list(zip(*chart_rows)) or [()] * len(CHART_SERIES)
+    chart_data = {name: column for name, column in zip(CHART_SERIES, columns)}
     
     context = {
         'evaluation_runs': evaluation_runs,
-        'chart_data': json.dumps(chart_data),
+        'chart_data': chart_data,
     }
     
     return render(request, "search/evaluation_comparison.html", context)
 
 
+# Result columns read by evaluation_api, the query columns through one join
+EVALUATION_API_RESULT_FIELDS = (
+    'id', 'target_chunk_found', 'target_chunk_rank', 'target_chunk_score', 'success', 'error_message',
+    'recall_at_5', 'ndcg_at_5', 'mrr',
+    'query__query', 'query__document_id', 'query__target_section', 'query__target_anchor',
+)
+
+
+def _result_data(result):
+    """Serializable form of one EvaluationResult row of EVALUATION_API_RESULT_FIELDS in evaluation_api."""
+    return {
+        'id': result.id,
+        'query': result.query__query,
+        'document_id': result.query__document_id,
+        'target_section': result.query__target_section,
+        'target_anchor': result.query__target_anchor,
+        'target_chunk_found': result.target_chunk_found,
+        'target_chunk_rank': result.target_chunk_rank,
+        'target_chunk_score': result.target_chunk_score,
+        'success': result.success,
+        'error_message': result.error_message,
+        'metrics': {
+            'recall_at_5': result.recall_at_5,
+            'ndcg_at_5': result.ndcg_at_5,
+            'mrr': result.mrr,
+        }
+    }
+
+
+def _stream_run_data(data, results):
+    """Yield data as a JSON object with a 'results' list serialized one result at a time."""
+    head = orjson.dumps(data)
+    yield head[:-1] + b',"results":['
+    for i, result in enumerate(results.iterator(chunk_size=500)):
+        if i:
+            yield b','
+        yield orjson.dumps(_result_data(result))
+    yield b']}'
+
+
+@gzip_page
 @staff_member_required
+@condition(etag_func=_evaluation_api_etag, last_modified_func=_evaluation_api_last_modified)
 def evaluation_api(request):
     """API endpoint for evaluation data"""
     if request.method == 'GET':
@@ -268,19 +505,19 @@ def evaluation_api(request):
         if run_id:
             # Get specific run data
             evaluation_run = get_object_or_404(EvaluationRun, id=run_id)
-            results = evaluation_run.results.all()
+            results = evaluation_run.results.values_list(*EVALUATION_API_RESULT_FIELDS, named=True)
             
             data = {
                 'run': {
-                    'id': str(evaluation_run.id),
+                    'id': evaluation_run.id,
                     'name': evaluation_run.name,
                     'status': evaluation_run.status,
                     'search_type': evaluation_run.search_type,
                     'score_threshold': evaluation_run.score_threshold,
                     'limit': evaluation_run.limit,
                     'embedding_model': evaluation_run.embedding_model,
-                    'created_at': evaluation_run.created_at.isoformat(),
-                    'completed_at': evaluation_run.completed_at.isoformat() if evaluation_run.completed_at else None,
+                    'created_at': evaluation_run.created_at,
+                    'completed_at': evaluation_run.completed_at,
                     'metrics': {
                         'recall_at_1': evaluation_run.recall_at_1,
                         'recall_at_5': evaluation_run.recall_at_5,
@@ -297,46 +534,33 @@ def evaluation_api(request):
                         'successful_queries': evaluation_run.successful_queries,
                         'failed_queries': evaluation_run.failed_queries,
                     }
-                },
-                'results': []
+                }
             }
             
-            for result in results:
-                data['results'].append({
-                    'id': str(result.id),
-                    'query': result.query.query,
-                    'document_id': result.query.document_id,
-                    'target_section': result.query.target_section,
-                    'target_anchor': result.query.target_anchor,
-                    'target_chunk_found': result.target_chunk_found,
-                    'target_chunk_rank': result.target_chunk_rank,
-                    'target_chunk_score': result.target_chunk_score,
-                    'success': result.success,
-                    'error_message': result.error_message,
-                    'metrics': {
-                        'recall_at_5': result.recall_at_5,
-                        'ndcg_at_5': result.ndcg_at_5,
-                        'mrr': result.mrr,
-                    }
-                })
-            
-            return JsonResponse(data)
+            # Results are written out as they are read, so large runs are
+            # never held in memory as one payload
+            return StreamingHttpResponse(_stream_run_data(data, results), content_type='application/json')
         
         else:
             # Get all runs summary
-            runs = EvaluationRun.objects.all().order_by('-created_at')
+            runs = EvaluationRun.objects.order_by('-created_at').values_list(
+                'id', 'name', 'status', 'search_type', 'created_at', 'completed_at',
+                'recall_at_5', 'ndcg_at_5', 'mrr',
+                'total_queries', 'successful_queries', 'failed_queries',
+                named=True
+            )
             data = {
                 'runs': []
             }
             
             for run in runs:
                 data['runs'].append({
-                    'id': str(run.id),
+                    'id': run.id,
                     'name': run.name,
                     'status': run.status,
                     'search_type': run.search_type,
-                    'created_at': run.created_at.isoformat(),
-                    'completed_at': run.completed_at.isoformat() if run.completed_at else None,
+                    'created_at': run.created_at,
+                    'completed_at': run.completed_at,
                     'metrics': {
                         'recall_at_5': run.recall_at_5,
                         'ndcg_at_5': run.ndcg_at_5,
@@ -349,6 +573,6 @@ def evaluation_api(request):
                     }
                 })
             
-            return JsonResponse(data)
+            return OrjsonResponse(data)
     
-    return JsonResponse({'error': 'Method not allowed'}, status=405)
\ No newline at end of file
+    return OrjsonResponse({'error': 'Method not allowed'}, status=405)
\ No newline at end of file